@@ -2,6 +2,8 @@
 let allData = [];
 let choroplethMap = null;
 let geoJsonLayer = null;
+let turkeyGeoData = null; // Province boundaries, fetched once
+let provinceCounts = null; // Precomputed by backend/boundaries.py (optional)
 let selectedYear = '2025'; // Default year filter
 
 // Sector options
@@ -19,6 +21,27 @@ const SECTOR_OPTIONS = [
     "Konaklama",
 ];
 
+// Districts or old names that show up in the `city` field; mirrors CITY_ALIASES in backend/boundaries.py
+const CITY_ALIASES = {
+    'afyon': 'afyonkarahisar',
+    'antakya': 'hatay',
+    'bandırma': 'balıkesir',
+    'bozova': 'şanlıurfa',
+    'ceylanpınar': 'şanlıurfa',
+    'tarsus': 'mersin',
+    'iliç': 'erzincan',
+    'urfa': 'şanlıurfa',
+    'maraş': 'kahramanmaraş',
+    'antep': 'gaziantep',
+    'içel': 'mersin',
+};
+
+// Mirrors boundaries.province_key(): Turkish lowercase, then the alias table
+function provinceKey(name) {
+    const key = String(name || '').trim().replace(/I/g, 'ı').replace(/İ/g, 'i').toLowerCase();
+    return CITY_ALIASES[key] || key;
+}
+
 // Turkish month names
 const TURKISH_MONTHS = [
     'Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
@@ -463,27 +486,54 @@ function initChoroplethMap() {
 
 async function loadTurkeyGeoJSON() {
     try {
-        // Use a public Turkey provinces GeoJSON
-        const response = await fetch('https://raw.githubusercontent.com/cihadturhan/tr-geojson/master/geo/tr-cities-utf8.json');
-        const geoData = await response.json();
+        if (!turkeyGeoData) {
+            // Vendored, simplified boundaries (backend/boundaries.py vendor)
+            const response = await fetch('geo/tr-provinces.json');
+            turkeyGeoData = await response.json();
+
+            try {
+                const countsResponse = await fetch(`geo/province_counts.json?ts=${Date.now()}`, { cache: 'no-store' });
+                if (countsResponse.ok) provinceCounts = await countsResponse.json();
+            } catch (error) {
+                provinceCounts = null;
+            }
+        }
 
-        updateChoroplethMap(geoData);
+        updateChoroplethMap(turkeyGeoData);
     } catch (error) {
         console.error('GeoJSON yüklenirken hata:', error);
     }
 }
 
-function updateChoroplethMap(geoData) {
-    const filtered = filterData(allData, 'map-gender', 'map-sector', 'map-date-start', 'map-date-end');
+// Precomputed counts are only valid when no per-map filter is set
+function getPrecomputedCounts() {
+    if (!provinceCounts) return null;
+    const filtersActive = ['map-gender', 'map-sector', 'map-date-start', 'map-date-end']
+        .some(id => document.getElementById(id)?.value);
+    if (filtersActive) return null;
+    if (selectedYear === 'all') return provinceCounts.total || null;
+    return (provinceCounts.by_year || {})[selectedYear] || {};
+}
 
+function updateChoroplethMap(geoData) {
     // Count by city
-    const cityCounts = {};
-    filtered.forEach(item => {
-        if (item.city) {
-            const city = item.city.trim();
-            cityCounts[city] = (cityCounts[city] || 0) + 1;
-        }
-    });
+    let cityCounts = getPrecomputedCounts();
+    if (!cityCounts) {
+        const filtered = filterData(allData, 'map-gender', 'map-sector', 'map-date-start', 'map-date-end');
+        // Same rule as boundaries.province_counts(): the stated city decides the province
+        const provinceNames = {};
+        geoData.features.forEach(feature => {
+            const name = feature.properties.name || feature.properties.NAME_1;
+            provinceNames[provinceKey(name)] = name;
+        });
+        cityCounts = {};
+        filtered.forEach(item => {
+            const province = provinceNames[provinceKey(item.city)];
+            if (province) {
+                cityCounts[province] = (cityCounts[province] || 0) + 1;
+            }
+        });
+    }
 
     // Find max for color scaling
     const maxCount = Math.max(...Object.values(cityCounts), 1);
@@ -1,8 +1,10 @@
 import os
-import json
 from openai import OpenAI
 from dotenv import load_dotenv
 
+import schema
+import usage
+
 # Ensure .env is loaded before reading key
 load_dotenv()
 
@@ -65,18 +67,42 @@ If unsure, set fields to null (never guess wildly).
 Output ONLY the JSON (no markdown fences).
 """
 
-def analyze_tweet(tweet_text, tweet_date_str=None):
+def reask(messages, stage="reask", ref=None):
+    """Sends a short follow-up built by schema.reask_messages and returns the raw answer."""
+    response = get_client().chat.completions.create(
+        model="deepseek-chat",
+        messages=messages,
+        temperature=0.0,
+    )
+    usage.record(stage, response, messages[0]["content"], messages[-1]["content"], ref=ref)
+    return response.choices[0].message.content
+
+
+def analyze_tweet(tweet_text, tweet_date_str=None, raise_on_error=False, ref=None):
     """
     Analyzes a tweet text using Deepseek API to extract work homicide data.
+    With raise_on_error, a missing key or client, API errors and parse errors propagate
+    (so callers can queue a retry) instead of being reported as None. Token usage is
+    logged under `ref` (see usage.py).
     """
     if not DEEPSEEK_API_KEY:
         print("Error: DEEPSEEK_API_KEY not found.")
+        if raise_on_error:
+            raise RuntimeError("DEEPSEEK_API_KEY not found")
+        return None
+
+    if usage.budget_exceeded():
+        print(f"Deepseek budget reached: {usage.budget_status()}")
+        if raise_on_error:
+            raise usage.BudgetExceeded(usage.budget_status())
         return None
 
     user_content = f"Tweet Date: {tweet_date_str}\nTweet Text: {tweet_text}"
 
     current_client = get_client()
     if not current_client:
+        if raise_on_error:
+            raise RuntimeError("Deepseek client could not be initialized")
         return None
 
     try:
@@ -88,23 +114,19 @@ def analyze_tweet(tweet_text, tweet_date_str=None):
             ],
             temperature=0.1
         )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Clean up potential markdown code blocks
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-        
-        if content.lower() == "null":
-            return None
-            
-        return json.loads(content)
+        usage.record("analyze", response, SYSTEM_PROMPT, user_content, ref=ref)
+
+        # Validated against schema.ANALYSIS_SCHEMA; unrepairable fields are re-asked on their own
+        return schema.parse_and_validate(
+            response.choices[0].message.content,
+            schema.ANALYSIS_SCHEMA,
+            required=("is_incident",),
+            reask=lambda messages: reask(messages, stage="analyze_reask", ref=ref),
+            context=user_content,
+        )
 
     except Exception as e:
         print(f"Error analyzing tweet: {e}")
+        if raise_on_error:
+            raise
         return None
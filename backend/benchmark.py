@@ -0,0 +1,186 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import boundaries
+import image_store
+import main
+import profile_shards
+import records
+import search_index
+import sectors
+import synth
+
+
+RESULTS_DIR = "benchmarks"
+
+
+def _timed(fn, repeat, setup=None):
+    """Runs fn `repeat` times, calling the untimed `setup` before each; returns (min_ms, median_ms, last_result)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 2), round(statistics.median(timings), 2), result
+
+
+def _cold(fn):
+    """Clears the memoization caches first so every repeat measures cold work."""
+    def run():
+        main.slugify.cache_clear()
+        sectors._matcher._cache.clear()
+        return fn()
+    return run
+
+
+def bench_scale(source, scale, repeat, workdir):
+    data = synth.generate(int(len(source) * scale), source, seed=int(scale * 1000))
+    data_file = os.path.join(workdir, "data.json")
+    records.dump_records(data, data_file)
+    main.DATA_FILE = data_file
+
+    loaded = main.load_data()
+    results = {"records": len(data), "timings_ms": {}, "sizes": {}}
+
+    def record(name, fn, setup=None):
+        best, median, value = _timed(fn, repeat, setup)
+        results["timings_ms"][name] = {"min": best, "median": median}
+        return value
+
+    record("load_data", main.load_data)
+    record("signature_map", lambda: {main.record_signature(item): item for item in loaded})
+    record("build_signature", _cold(lambda: [
+        main.build_signature(r.get("person_name"), r.get("date"), r.get("city")) for r in loaded
+    ]))
+    record("slugify", _cold(lambda: [main.slugify(r.get("person_name")) for r in loaded]))
+    record("parse_age_fields", lambda: [main.parse_age_fields(r) for r in loaded])
+    record("normalize_sector", _cold(lambda: [sectors.normalize_sector(r.get("sector_raw")) for r in loaded]))
+    record("dump_records", lambda: records.dump_records(loaded, data_file))
+
+    # Full offline cycle: load, re-derive, add a batch of new records, commit with
+    # profile shards, image manifest, search index and counts (cwd is the work dir, so
+    # derived files land there; run() copies the boundaries in so counts are not skipped). Cold starts without derived files, so every shard is
+    # written; warm starts from the files of the base data, so only changed shards are.
+    extra = synth.generate(max(1, len(data) // 100), source, seed=int(scale * 1000) + 1)
+
+    def reset_data():
+        records.dump_records(data, data_file)
+
+    def reset_all():
+        reset_data()
+        for directory in (profile_shards.PROFILES_DIR, search_index.SEARCH_DIR, image_store.MANIFEST_DIR):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def cycle():
+        current = main.load_data()
+        main.rebuild_records(current)
+        current.extend(records.Record.from_dict(entry) for entry in extra)
+        return main.save_data(current)
+
+    def prime():
+        reset_all()
+        main.save_data(main.load_data())
+
+    record("ingest_save_cold", cycle, setup=reset_all)
+    record("ingest_save_warm", cycle, setup=prime)
+
+    with open(data_file, "rb") as handle:
+        raw = handle.read()
+    results["sizes"] = {
+        "data_json_bytes": len(raw),
+        "data_json_gzip_bytes": len(gzip.compress(raw, 6)),
+        "bytes_per_record": round(len(raw) / max(len(data), 1), 1),
+    }
+    return results
+
+
+def run(source_path, scales, repeat):
+    source = records.load_records(source_path)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "source_records": len(source),
+        "repeat": repeat,
+        "scales": {},
+    }
+    original_cwd = os.getcwd()
+    original_data_file = main.DATA_FILE
+    provinces = os.path.abspath(boundaries.PROVINCES_FILE)
+    if boundaries.get_index() is None:
+        print(f"{provinces} not found; the cycle will not include province counts.")
+    try:
+        for scale in scales:
+            with tempfile.TemporaryDirectory() as workdir:
+                if os.path.exists(provinces):
+                    os.makedirs(os.path.join(workdir, boundaries.GEO_DIR), exist_ok=True)
+                    shutil.copy(provinces, os.path.join(workdir, boundaries.PROVINCES_FILE))
+                os.chdir(workdir)
+                print(f"Scale {scale}x ...")
+                report["scales"][f"{scale:g}"] = bench_scale(source, scale, repeat, workdir)
+                os.chdir(original_cwd)
+    finally:
+        os.chdir(original_cwd)
+        main.DATA_FILE = original_data_file
+    return report
+
+
+def compare(current, previous):
+    """Prints median deltas between two reports, per scale and function."""
+    for scale, result in current["scales"].items():
+        before = previous.get("scales", {}).get(scale)
+        if not before:
+            continue
+        print(f"\nScale {scale}x vs {previous.get('timestamp')}:")
+        for name, timing in result["timings_ms"].items():
+            old = before["timings_ms"].get(name)
+            if not old or not old["median"]:
+                continue
+            change = (timing["median"] - old["median"]) / old["median"]
+            print(f"  {name:<20} {old['median']:>10.2f} -> {timing['median']:>10.2f} ms ({change:+.0%})")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the data-path functions on synthetic data.")
+    parser.add_argument("--input", default="data.json", help="Dataset to learn distributions from.")
+    parser.add_argument("--scales", default="1,10", help="Comma-separated multiples of the input size (e.g. 1,10,100).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per measurement.")
+    parser.add_argument("--output-dir", default=RESULTS_DIR, help="Directory for JSON result files.")
+    parser.add_argument("--compare", default=None, help="Result file to diff against (defaults to the latest one).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    output_dir = os.path.abspath(args.output_dir)
+    previous_files = sorted(glob.glob(os.path.join(output_dir, "bench-*.json")))
+    baseline = args.compare or (previous_files[-1] if previous_files else None)
+
+    report = run(args.input, [float(s) for s in args.scales.split(",")], args.repeat)
+
+    os.makedirs(output_dir, exist_ok=True)
+    out_path = os.path.join(output_dir, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=2)
+
+    for scale, result in report["scales"].items():
+        print(f"\nScale {scale}x ({result['records']} records, {result['sizes']['data_json_bytes'] / 1e6:.1f} MB,"
+              f" {result['sizes']['data_json_gzip_bytes'] / 1e6:.1f} MB gzip):")
+        for name, timing in result["timings_ms"].items():
+            print(f"  {name:<20} min {timing['min']:>10.2f} ms   median {timing['median']:>10.2f} ms")
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+    print(f"\nResults saved to {out_path}.")
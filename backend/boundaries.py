@@ -0,0 +1,488 @@
+import argparse
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import storage
+from textnorm import turkish_lower
+
+
+GEO_DIR = Path("geo")
+PROVINCES_FILE = GEO_DIR / "tr-provinces.json"
+COUNTS_FILE = GEO_DIR / "province_counts.json"
+SOURCE_URL = "https://raw.githubusercontent.com/cihadturhan/tr-geojson/master/geo/tr-cities-utf8.json"
+
+# ~1 km at Turkish latitudes; plenty for a province-level choropleth
+DEFAULT_TOLERANCE = 0.01
+# Simplified borders can be off by the tolerance, so coords this close to the stated
+# province are never treated as being somewhere else
+BORDER_MARGIN = 2 * DEFAULT_TOLERANCE
+
+# Districts or old names that show up in the `city` field; mirrored in analysis.js
+CITY_ALIASES = {
+    "afyon": "afyonkarahisar",
+    "antakya": "hatay",
+    "bandırma": "balıkesir",
+    "bozova": "şanlıurfa",
+    "ceylanpınar": "şanlıurfa",
+    "tarsus": "mersin",
+    "iliç": "erzincan",
+    "urfa": "şanlıurfa",
+    "maraş": "kahramanmaraş",
+    "antep": "gaziantep",
+    "içel": "mersin",
+}
+
+
+def province_key(name: str) -> str:
+    key = turkish_lower((name or "").strip())
+    return CITY_ALIASES.get(key, key)
+
+
+# ---------------------------------------------------------------------------
+# Geometry helpers (coordinates are GeoJSON [lon, lat])
+# ---------------------------------------------------------------------------
+
+def _perpendicular_distance(point, start, end):
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    return abs(dy * x - dx * y + x2 * y1 - y2 * x1) / (dx * dx + dy * dy) ** 0.5
+
+
+def simplify_line(line, tolerance):
+    """Douglas-Peucker on an open line; both end points are kept."""
+    if len(line) <= 2:
+        return line
+    keep = [False] * len(line)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(line) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_dist, index = 0.0, None
+        for i in range(first + 1, last):
+            dist = _perpendicular_distance(line[i], line[first], line[last])
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index is not None and max_dist > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [pt for pt, k in zip(line, keep) if k]
+
+
+def simplify_shared(rings, tolerance):
+    """
+    Topology-preserving simplification of many rings at once (TopoJSON style).
+    Rings are cut into arcs at the junctions where borders meet, each distinct arc is
+    simplified once and reused by every ring that contains it, so neighbouring provinces
+    keep one identical border instead of two independently simplified ones.
+    `rings` are closed lists of hashable (x, y) points; returns them in the same order.
+    """
+    neighbours = defaultdict(set)
+    for ring in rings:
+        for i in range(len(ring) - 1):
+            neighbours[ring[i]].update((ring[i - 1] if i else ring[-2], ring[i + 1]))
+    # A junction is where more than one border passes through a point
+    junctions = {pt for pt, near in neighbours.items() if len(near) > 2}
+
+    arcs = {}
+
+    def _arc(points):
+        key = tuple(points)
+        reverse = key[::-1]
+        if reverse < key:
+            return _arc(reverse)[::-1]
+        if key not in arcs:
+            arcs[key] = simplify_line(list(key), tolerance)
+        return arcs[key]
+
+    result = []
+    for ring in rings:
+        body = ring[:-1]
+        cuts = [i for i, pt in enumerate(body) if pt in junctions]
+        flipped = False
+        if not cuts:
+            # No junction (an island, or an enclave and the hole it fills): start at the
+            # smallest point in one orientation so both copies simplify identically
+            start = body.index(min(body))
+            body = body[start:] + body[:start]
+            flipped = body[-1] < body[1]
+            if flipped:
+                body = body[:1] + body[:0:-1]
+            cuts = [0]
+        else:
+            body = body[cuts[0]:] + body[:cuts[0]]
+            cuts = [i - cuts[0] for i in cuts]
+
+        closed = body + body[:1]
+        simplified = []
+        for start, end in zip(cuts, cuts[1:] + [len(body)]):
+            simplified.extend(_arc(closed[start:end + 1])[:-1])
+        simplified.append(simplified[0])
+        if len(simplified) < 4:
+            simplified = closed
+        result.append(simplified[::-1] if flipped else simplified)
+    return result
+
+
+def _polygons_of(geometry):
+    """Returns a list of polygons, each a list of rings (outer first)."""
+    if geometry.get("type") == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiPolygon":
+        return list(geometry["coordinates"])
+    return []
+
+
+def _ring_contains(ring, x, y):
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _ring_area_centroid(ring):
+    area = cx = cy = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        cross = x1 * y2 - x2 * y1
+        area += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    if area == 0:
+        xs = [p[0] for p in ring]
+        ys = [p[1] for p in ring]
+        return 0.0, (sum(xs) / len(xs), sum(ys) / len(ys))
+    area *= 0.5
+    return abs(area), (cx / (6 * area), cy / (6 * area))
+
+
+class Province:
+    __slots__ = ("name", "key", "polygons", "bbox")
+
+    def __init__(self, name, polygons):
+        self.name = name
+        self.key = province_key(name)
+        self.polygons = polygons
+        xs = [pt[0] for poly in polygons for pt in poly[0]]
+        ys = [pt[1] for poly in polygons for pt in poly[0]]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, lon, lat):
+        minx, miny, maxx, maxy = self.bbox
+        if lon < minx or lon > maxx or lat < miny or lat > maxy:
+            return False
+        for rings in self.polygons:
+            if _ring_contains(rings[0], lon, lat) and not any(
+                _ring_contains(hole, lon, lat) for hole in rings[1:]
+            ):
+                return True
+        return False
+
+    def boundary_distance(self, lon, lat):
+        """Distance in degrees from a point to the nearest edge of the province."""
+        best = float("inf")
+        for rings in self.polygons:
+            for ring in rings:
+                for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                    dx, dy = x2 - x1, y2 - y1
+                    length = dx * dx + dy * dy
+                    t = max(0.0, min(1.0, ((lon - x1) * dx + (lat - y1) * dy) / length)) if length else 0.0
+                    best = min(best, ((lon - x1 - t * dx) ** 2 + (lat - y1 - t * dy) ** 2) ** 0.5)
+        return best
+
+    def representative_point(self):
+        """[lat, lon] inside the largest polygon (centroid, or a scanline midpoint for concave shapes)."""
+        rings = max(self.polygons, key=lambda poly: _ring_area_centroid(poly[0])[0])
+        outer = rings[0]
+        _, (cx, cy) = _ring_area_centroid(outer)
+        if self.contains(cx, cy):
+            return [cy, cx]
+        xs = []
+        for (x1, y1), (x2, y2) in zip(outer, outer[1:] + outer[:1]):
+            if (y1 > cy) != (y2 > cy):
+                xs.append(x1 + (cy - y1) * (x2 - x1) / (y2 - y1))
+        xs.sort()
+        pairs = [(xs[i], xs[i + 1]) for i in range(0, len(xs) - 1, 2)]
+        if not pairs:
+            return [cy, cx]
+        left, right = max(pairs, key=lambda pair: pair[1] - pair[0])
+        return [cy, (left + right) / 2]
+
+
+class STRTree:
+    """Sort-Tile-Recursive packed R-tree over Province bounding boxes."""
+
+    NODE_CAPACITY = 8
+
+    def __init__(self, items):
+        level = [(item.bbox, item) for item in items]
+        while len(level) > self.NODE_CAPACITY:
+            level = self._pack(level)
+        self.root = level
+
+    def _pack(self, entries):
+        cap = self.NODE_CAPACITY
+        leaf_count = -(-len(entries) // cap)
+        slab_count = max(1, int(leaf_count ** 0.5 + 0.999))
+        slab_size = slab_count * cap
+        entries = sorted(entries, key=lambda e: (e[0][0] + e[0][2]) / 2)
+        parents = []
+        for s in range(0, len(entries), slab_size):
+            slab = sorted(entries[s:s + slab_size], key=lambda e: (e[0][1] + e[0][3]) / 2)
+            for n in range(0, len(slab), cap):
+                children = slab[n:n + cap]
+                bbox = (
+                    min(c[0][0] for c in children),
+                    min(c[0][1] for c in children),
+                    max(c[0][2] for c in children),
+                    max(c[0][3] for c in children),
+                )
+                parents.append((bbox, children))
+        return parents
+
+    def query_point(self, lon, lat):
+        """Yields items whose bbox contains the point."""
+        stack = list(self.root)
+        while stack:
+            (minx, miny, maxx, maxy), payload = stack.pop()
+            if lon < minx or lon > maxx or lat < miny or lat > maxy:
+                continue
+            if isinstance(payload, list):
+                stack.extend(payload)
+            else:
+                yield payload
+
+
+class ProvinceIndex:
+    def __init__(self, provinces):
+        self.provinces = provinces
+        self.by_key = {p.key: p for p in provinces}
+        self.tree = STRTree(provinces)
+
+    @classmethod
+    def from_geojson(cls, geo_data):
+        provinces = []
+        for feature in geo_data.get("features", []):
+            props = feature.get("properties") or {}
+            name = props.get("name") or props.get("NAME_1")
+            polygons = _polygons_of(feature.get("geometry") or {})
+            if name and polygons:
+                provinces.append(Province(name, polygons))
+        return cls(provinces)
+
+    def locate(self, coords):
+        """Province containing [lat, lon], or None."""
+        if not isinstance(coords, (list, tuple)) or len(coords) != 2:
+            return None
+        lat, lon = coords
+        for province in self.tree.query_point(lon, lat):
+            if province.contains(lon, lat):
+                return province
+        return None
+
+    def province_for_city(self, city):
+        return self.by_key.get(province_key(city)) if city else None
+
+    def misplaced(self, coords, province, margin=BORDER_MARGIN):
+        """
+        The other province that [lat, lon] clearly lies in, or None. Points in no province
+        (coast, lakes, simplification slivers) and points within `margin` of the stated
+        province's border are given the benefit of the doubt.
+        """
+        located = self.locate(coords)
+        if located is None or located is province:
+            return None
+        lat, lon = coords
+        if province.boundary_distance(lon, lat) < margin:
+            return None
+        return located
+
+
+_index = None
+
+
+def get_index(path=None):
+    """Lazily loads the vendored boundaries; returns None when they have not been vendored yet."""
+    global _index
+    if _index is not None and path is None:
+        return _index
+    path = Path(path or PROVINCES_FILE)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        index = ProvinceIndex.from_geojson(json.load(handle))
+    if path == PROVINCES_FILE:
+        _index = index
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def vendor_boundaries(source=SOURCE_URL, dest=PROVINCES_FILE, tolerance=DEFAULT_TOLERANCE, precision=4):
+    """Reads province GeoJSON from a path or URL, simplifies it and writes a compact copy."""
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as handle:
+            geo_data = json.load(handle)
+    else:
+        import requests
+        response = requests.get(source, timeout=60)
+        response.raise_for_status()
+        geo_data = response.json()
+
+    provinces = []
+    rings = []
+    for feature in geo_data.get("features", []):
+        props = feature.get("properties") or {}
+        name = props.get("name") or props.get("NAME_1")
+        polygons = []
+        for polygon in _polygons_of(feature.get("geometry") or {}):
+            ring_ids = []
+            for ring in polygon:
+                rounded = []
+                for x, y, *_ in ring:
+                    point = (round(x, precision), round(y, precision))
+                    if not rounded or rounded[-1] != point:
+                        rounded.append(point)
+                if len(rounded) < 4:
+                    continue
+                if rounded[0] != rounded[-1]:
+                    rounded.append(rounded[0])
+                ring_ids.append(len(rings))
+                rings.append(rounded)
+            if ring_ids:
+                polygons.append(ring_ids)
+        if name and polygons:
+            provinces.append((name, polygons))
+
+    simplified = simplify_shared(rings, tolerance)
+    features = []
+    for name, polygons in provinces:
+        coordinates = [[[list(point) for point in simplified[i]] for i in ring_ids] for ring_ids in polygons]
+        geometry = (
+            {"type": "Polygon", "coordinates": coordinates[0]}
+            if len(coordinates) == 1
+            else {"type": "MultiPolygon", "coordinates": coordinates}
+        )
+        features.append({"type": "Feature", "properties": {"name": name}, "geometry": geometry})
+    before = sum(len(ring) for ring in rings)
+    after = sum(len(ring) for ring in simplified)
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with storage.atomic_open(dest) as handle:
+        json.dump({"type": "FeatureCollection", "features": features}, handle, ensure_ascii=False, separators=(",", ":"))
+    print(f"Vendored {len(features)} provinces to {dest} ({before} -> {after} vertices).")
+
+
+def validate_records(records, index, fix=False):
+    """
+    Checks each record's coords against the polygon of its stated city. Only coords that
+    are missing or clearly inside another province count as mismatches (see
+    ProvinceIndex.misplaced). With fix=True, those are moved to a point inside the stated
+    province. Returns a list of (record_id, city, located_province_name_or_None) mismatches.
+    """
+    mismatches = []
+    for record in records:
+        stated = index.province_for_city(record.get("city"))
+        if not stated:
+            continue
+        coords = record.get("coords")
+        if isinstance(coords, (list, tuple)) and len(coords) == 2:
+            located = index.misplaced(coords, stated)
+            if located is None:
+                continue
+        else:
+            located = None
+        mismatches.append((record.get("id"), record.get("city"), located.name if located else None))
+        if fix:
+            record["coords"] = stated.representative_point()
+    return mismatches
+
+
+def province_counts(records, index):
+    """
+    Per-province counts, total and per year. The stated city decides the province, the
+    same rule the analysis page uses when it counts filtered data itself; records whose
+    city is not a Turkish province (abroad, unknown) are not counted.
+    """
+    total = defaultdict(int)
+    by_year = defaultdict(lambda: defaultdict(int))
+    for record in records:
+        province = index.province_for_city(record.get("city"))
+        if not province:
+            continue
+        total[province.name] += 1
+        parts = (record.get("date") or "").split(".")
+        if len(parts) == 3 and parts[2].isdigit():
+            by_year[parts[2]][province.name] += 1
+    return {"total": dict(total), "by_year": {year: dict(counts) for year, counts in sorted(by_year.items())}}
+
+
+def write_counts(records, index, dest=COUNTS_FILE):
+    counts = province_counts(records, index)
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with storage.atomic_open(dest) as handle:
+        json.dump(counts, handle, ensure_ascii=False, separators=(",", ":"))
+    return counts
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Province boundaries: vendoring, coordinate validation, choropleth counts.")
+    parser.add_argument("--boundaries", default=str(PROVINCES_FILE), help="Vendored province GeoJSON.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    vendor = subparsers.add_parser("vendor", help="Download or copy and simplify province boundaries.")
+    vendor.add_argument("--source", default=SOURCE_URL, help="GeoJSON path or URL.")
+    vendor.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Simplification tolerance in degrees.")
+
+    validate = subparsers.add_parser("validate", help="Check record coords against their stated city.")
+    validate.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    validate.add_argument("--fix", action="store_true", help="Move mismatching coords inside the stated province.")
+
+    counts = subparsers.add_parser("counts", help="Precompute per-province counts for the choropleth.")
+    counts.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    counts.add_argument("--output", default=str(COUNTS_FILE), help="Where to write the counts.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+
+    if args.command == "vendor":
+        vendor_boundaries(args.source, args.boundaries, args.tolerance)
+        raise SystemExit(0)
+
+    index = get_index(args.boundaries)
+    if index is None:
+        raise SystemExit(f"{args.boundaries} not found; run the 'vendor' command first.")
+
+    with open(args.input, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+
+    if args.command == "validate":
+        mismatches = validate_records(data, index, fix=args.fix)
+        for record_id, city, located in mismatches:
+            print(f"{record_id}: stated {city}, coords in {located or 'no province'}")
+        print(f"{len(mismatches)} of {len(data)} records have coords outside their stated city.")
+        if args.fix and mismatches:
+            from main import record_signature, refresh_derived
+
+            fixed_ids = {record_id for record_id, _, _ in mismatches}
+            updates = {storage.update_key(r, record_signature): r for r in data if r.get("id") in fixed_ids}
+            storage.apply_changes(args.input, updates, [], record_signature)
+            refresh_derived(path=args.input)
+            print(f"Fixed coords saved to {args.input}.")
+    elif args.command == "counts":
+        counts = write_counts(data, index, args.output)
+        print(f"Wrote counts for {len(counts['total'])} provinces to {args.output}.")
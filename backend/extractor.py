@@ -0,0 +1,460 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import records
+from boundaries import province_key
+from sectors import find_sector_keyword, normalize_sector
+from textnorm import turkish_lower
+
+
+# Results at or above this confidence skip the LLM (see main.analyze_with_cascade).
+# 0.95 needs every scored field, including a date written in the tweet; lower it only
+# when `extractor.py` reports enough held-out precision for the new value.
+CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_EXTRACT_THRESHOLD", "0.95"))
+TARGET_PRECISION = 0.95
+# Floor for local results once the Deepseek budget is spent (BUDGET_ACTION=downgrade).
+# Above 0.6 a result can never carry the list/commemoration penalty (see extract).
+DOWNGRADE_THRESHOLD = float(os.getenv("LOCAL_DOWNGRADE_THRESHOLD", "0.7"))
+
+# Text of every analyzed tweet, appended by main.process_tweets; evaluate() scores on it
+TWEET_LOG = 'tweet_texts.jsonl'
+# Share of logged tweets held out from the gazetteer and scored
+TEST_SHARE = 0.2
+
+PROVINCES = [
+    "Adana", "Adıyaman", "Afyonkarahisar", "Ağrı", "Aksaray", "Amasya", "Ankara", "Antalya",
+    "Ardahan", "Artvin", "Aydın", "Balıkesir", "Bartın", "Batman", "Bayburt", "Bilecik",
+    "Bingöl", "Bitlis", "Bolu", "Burdur", "Bursa", "Çanakkale", "Çankırı", "Çorum",
+    "Denizli", "Diyarbakır", "Düzce", "Edirne", "Elazığ", "Erzincan", "Erzurum", "Eskişehir",
+    "Gaziantep", "Giresun", "Gümüşhane", "Hakkari", "Hatay", "Iğdır", "Isparta", "İstanbul",
+    "İzmir", "Kahramanmaraş", "Karabük", "Karaman", "Kars", "Kastamonu", "Kayseri", "Kilis",
+    "Kırıkkale", "Kırklareli", "Kırşehir", "Kocaeli", "Konya", "Kütahya", "Malatya", "Manisa",
+    "Mardin", "Mersin", "Muğla", "Muş", "Nevşehir", "Niğde", "Ordu", "Osmaniye",
+    "Rize", "Sakarya", "Samsun", "Şanlıurfa", "Siirt", "Sinop", "Sivas", "Şırnak",
+    "Tekirdağ", "Tokat", "Trabzon", "Tunceli", "Uşak", "Van", "Yalova", "Yozgat",
+    "Zonguldak",
+    # Short forms used in tweets; the dataset keeps "Afyon" as the city name
+    "Afyon", "Urfa", "Antep", "Maraş",
+]
+
+SHORT_FORMS = {"Urfa": "Şanlıurfa", "Antep": "Gaziantep", "Maraş": "Kahramanmaraş"}
+
+TURKISH_MONTHS = [
+    "Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+    "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık",
+]
+
+_UPPER = "A-ZÇĞİÖŞÜ"
+_LOWER = "a-zçğıöşüâîû"
+_WORD = rf"[{_UPPER}][{_LOWER}]+"
+_NAME = rf"{_WORD}(?: {_WORD}){{1,3}}"
+
+DEATH_RE = re.compile(
+    r"(hayatlarını kaybettiler|hayatlarını kaybetti|hayatını kaybetti|"
+    r"yaşamlarını yitirdiler|yaşamlarını yitirdi|yaşamını yitirdi|can verdi|öldü)"
+)
+AGE_NAME_RE = re.compile(rf"(\d{{1,2}})(?:-(\d{{1,2}}))? yaş(?:ındaki|larındaki) (?:[^\s,.]+ ){{0,4}}?({_NAME})")
+ROLE_NAME_RE = re.compile(rf"(?:işçi|işçisi|şoförü|ustası|operatörü|çalışanı|çobanı) ({_NAME})")
+LEADING_NAME_RE = re.compile(rf"^({_NAME}),")
+PROVINCE_RE = re.compile(
+    r"(?<![\w])(" + "|".join(sorted(PROVINCES, key=len, reverse=True)) + r")(?:'[" + _LOWER + r"]+|(?![\w]))"
+)
+# A job or workplace phrase: up to two words before a job / workplace word, plus that word
+WORKPLACE_RE = re.compile(
+    r"(?:[^\s,.]+ ){0,2}[^\s,.]*(?:işçi|çalışan|çalışır|şantiye|inşaat|fabrika|maden|ocağı|tesis|atölye|"
+    r"işyeri|sektör|şoför|operatör)[^\s,.]*"
+)
+DISTRICT_SUFFIX_RE = re.compile(rf"({_WORD}) ilçesi")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b")
+MONTH_DATE_RE = re.compile(r"\b(\d{1,2}) (" + "|".join(TURKISH_MONTHS) + r")\b(?: (\d{4}))?")
+COMPANY_RE = re.compile(
+    rf"((?:[{_UPPER}0-9][\w&.]*\s){{0,3}}[{_UPPER}][\w&.]*)(?:'[{_LOWER}]+)? "
+    r"(?:A\.Ş\.|Ltd\.|firması|firmasında|şirketi|şirketinde|fabrikası|fabrikasında|tesisinde|madeninde)"
+)
+# Monthly reports, lists and commemorations are left to the LLM
+STATISTIC_RE = re.compile(r"(\ben az\b|\bayında\b|\byılında\b|\d+ işçi\b|#|anıyoruz|unutmadık)", re.IGNORECASE)
+
+_gazetteer = {"districts": defaultdict(set), "first_names": {}}
+
+
+def learn_gazetteer(data):
+    """
+    Builds the district list per province and a first-name -> gender table from
+    existing records, so the extractor improves as the dataset grows.
+    """
+    districts = defaultdict(set)
+    name_genders = defaultdict(Counter)
+    for record in data:
+        city = record.get("city")
+        district = record.get("district")
+        if city and district and district != "Merkez":
+            districts[province_key(city)].add(district)
+        first = (record.get("person_name") or "").split(" ")[0]
+        gender = record.get("gender")
+        if first and gender in ("Erkek", "Kadın"):
+            name_genders[turkish_lower(first)][gender] += 1
+    _gazetteer["districts"] = districts
+    _gazetteer["first_names"] = {
+        name: counts.most_common(1)[0][0]
+        for name, counts in name_genders.items()
+        if counts.most_common(1)[0][1] >= 0.9 * sum(counts.values())
+    }
+
+
+def _capitalize(text):
+    if not text:
+        return text
+    first = "İ" if text[0] == "i" else ("I" if text[0] == "ı" else text[0].upper())
+    return first + text[1:]
+
+
+def _format_tweet_date(tweet_date_str):
+    """twikit created_at ('Fri Dec 05 10:00:00 +0000 2025') or ISO -> DD.MM.YYYY."""
+    if not tweet_date_str:
+        return None, None
+    for fmt in ("%a %b %d %H:%M:%S %z %Y", "%Y-%m-%d %H:%M:%S%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(str(tweet_date_str), fmt)
+            return parsed.strftime("%d.%m.%Y"), parsed.year
+        except ValueError:
+            continue
+    return None, None
+
+
+def _extract_date(text, tweet_date_str):
+    """Returns (date, explicit) where explicit says the date came from the text itself."""
+    fallback, tweet_year = _format_tweet_date(tweet_date_str)
+    found = NUMERIC_DATE_RE.search(text)
+    if found:
+        day, month, year = found.groups()
+        return f"{int(day):02d}.{int(month):02d}.{year}", True
+    found = MONTH_DATE_RE.search(text)
+    if found and (found.group(3) or tweet_year):
+        day, month_name, year = found.groups()
+        month = TURKISH_MONTHS.index(month_name) + 1
+        return f"{int(day):02d}.{month:02d}.{year or tweet_year}", True
+    return fallback, False
+
+
+def _extract_victims(text, provinces):
+    victims = []
+    seen = set()
+
+    def _add(name, age_min=None, age_max=None):
+        if name in seen or name.split(" ")[0] in provinces:
+            return
+        seen.add(name)
+        gender = _gazetteer["first_names"].get(turkish_lower(name.split(" ")[0]), "Bilinmiyor")
+        victims.append({
+            "name": name,
+            "age": age_min if age_min is not None and age_min == age_max else None,
+            "age_min": age_min,
+            "age_max": age_max,
+            "gender": gender,
+        })
+
+    for found in AGE_NAME_RE.finditer(text):
+        low = int(found.group(1))
+        high = int(found.group(2)) if found.group(2) else low
+        _add(found.group(3), low, high)
+    for found in ROLE_NAME_RE.finditer(text):
+        _add(found.group(1))
+    found = LEADING_NAME_RE.match(text)
+    if found:
+        _add(found.group(1))
+    return victims
+
+
+def _extract_cause(text, death):
+    """The clause right before the death phrase, e.g. 'Yüksekten düşerek hayatını kaybetti.'"""
+    start = max(text.rfind(",", 0, death.start()), text.rfind(".", 0, death.start())) + 1
+    clause = text[start:death.start()].strip()
+    words = clause.split()
+    # Drop everything up to the victim subject ("<age> yaşındaki <Name>", "işçi <Name>")
+    subject_end = max(
+        (found.end() for regex in (AGE_NAME_RE, ROLE_NAME_RE, LEADING_NAME_RE) for found in regex.finditer(clause)),
+        default=0,
+    )
+    if subject_end:
+        words = clause[subject_end:].split()
+    words = words[-8:]
+    if not words:
+        return None
+    return _capitalize(" ".join(words + [death.group(1)])) + "."
+
+
+def _extract_sector(text):
+    """
+    Sector keyword from a job or workplace phrase only ("maden işçisi", "inşaatında
+    çalışan"). Matching the whole tweet lets ordinary words decide the sector: "yolda",
+    the month "Ocak", "kaynak" as in source.
+    """
+    for found in WORKPLACE_RE.finditer(turkish_lower(text)):
+        keyword = find_sector_keyword(found.group(0))
+        if keyword:
+            return keyword
+    return None
+
+
+def _sentence_with(text, position):
+    start = max(text.rfind(". ", 0, position), -1) + 1
+    end = text.find(". ", position)
+    return text[start:end + 1 if end != -1 else len(text)].strip()
+
+
+def reports_incident(tweet_text):
+    """True when the text carries its own death phrase and province (not a name/photo-only reply)."""
+    text = tweet_text or ""
+    return bool(DEATH_RE.search(text) and PROVINCE_RE.search(text))
+
+
+def extract(tweet_text, tweet_date_str=None):
+    """
+    Rule-based extraction with the same dict shape as analyzer.analyze_tweet, plus a
+    `confidence` score in [0, 1]. Returns None when the text has no death phrase at all.
+    """
+    text = re.sub(r"https?://\S+", "", tweet_text or "").strip()
+    death = DEATH_RE.search(text)
+    if not death:
+        return None
+
+    mentioned = []
+    for found in PROVINCE_RE.finditer(text):
+        name = SHORT_FORMS.get(found.group(1), found.group(1))
+        if name not in mentioned:
+            mentioned.append(name)
+    city = mentioned[0] if mentioned else None
+
+    district = None
+    if city:
+        for candidate in sorted(_gazetteer["districts"].get(province_key(city), ()), key=len, reverse=True):
+            if re.search(rf"(?<![\w]){re.escape(candidate)}(?![\w])", text):
+                district = candidate
+                break
+    if not district:
+        found = DISTRICT_SUFFIX_RE.search(text)
+        district = found.group(1) if found else None
+
+    victims = _extract_victims(text, set(PROVINCES))
+    cause = _extract_cause(text, death)
+    date, explicit_date = _extract_date(text, tweet_date_str)
+    company_match = COMPANY_RE.search(text)
+    company = company_match.group(1).strip() if company_match else None
+    if company and (company in mentioned or any(company == v["name"] for v in victims)):
+        company = None
+
+    location = " ".join(part for part in (city, district) if part) or None
+
+    confidence = 0.0
+    if victims:
+        confidence += 0.3
+        if all(v["age_min"] is not None for v in victims):
+            confidence += 0.1
+    if city:
+        confidence += 0.25
+    if cause:
+        confidence += 0.2
+    if district:
+        confidence += 0.05
+    if explicit_date:
+        confidence += 0.1
+    if len(mentioned) > 1:
+        confidence -= 0.2
+    if STATISTIC_RE.search(text) or len(victims) > 3:
+        confidence -= 0.4
+
+    return {
+        "is_incident": True,
+        "date": date,
+        "city": city,
+        "district": district,
+        "location": location,
+        "company": company,
+        "sector_raw": _extract_sector(text),
+        "cause": cause,
+        "details": _sentence_with(text, death.start()),
+        "victims": victims,
+        "confidence": round(max(0.0, min(confidence, 1.0)), 2),
+    }
+
+
+def is_confident(result, threshold=None):
+    """True when a local result may replace the LLM call."""
+    if not result or not result.get("is_incident"):
+        return False
+    threshold = CONFIDENCE_THRESHOLD if threshold is None else threshold
+    has_required = (
+        result.get("city")
+        and (result.get("cause") or result.get("details"))
+        and any((v.get("name") or "").strip() for v in result.get("victims") or [])
+    )
+    return bool(has_required) and result.get("confidence", 0) >= threshold
+
+
+def is_downgrade_safe(result, text, tweet_date_str=None):
+    """
+    Stricter is_confident for when the budget is spent: the result must reach
+    DOWNGRADE_THRESHOLD, the tweet must not read like a list or commemoration, and the
+    date must be written in the tweet rather than taken from its timestamp.
+    """
+    if not is_confident(result, threshold=DOWNGRADE_THRESHOLD) or STATISTIC_RE.search(text or ""):
+        return False
+    _, explicit_date = _extract_date(text or "", tweet_date_str)
+    return explicit_date
+
+
+def log_tweet(tweet_id, text, created_at):
+    """Appends the text of an analyzed tweet to TWEET_LOG, the evaluation corpus."""
+    entry = {"id": str(tweet_id), "text": text, "created_at": str(created_at)}
+    with open(TWEET_LOG, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_tweet_log(path=TWEET_LOG):
+    """{tweet id: (text, created_at)}; the latest entry of a tweet wins."""
+    tweets = {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    tweets[entry["id"]] = (entry.get("text"), entry.get("created_at"))
+    except FileNotFoundError:
+        pass
+    return tweets
+
+
+def is_held_out(tweet_id, share=TEST_SHARE):
+    """Stable split by tweet id, so a tweet stays in the same split across runs."""
+    return int(hashlib.sha1(str(tweet_id).encode("utf-8")).hexdigest()[:8], 16) < share * 0x100000000
+
+
+def _cause_stems(text):
+    words = re.findall(r"\w{4,}", turkish_lower(text or ""))
+    return {word[:5] for word in words} - {"hayat", "kaybe", "yaşam", "yitir"}
+
+
+def _score(result, tweet_records):
+    """{field: correct?} for the fields both the result and the stored records have."""
+    import main
+
+    record = tweet_records[0]
+    victim = next((v for v in result["victims"] if v.get("name")), None)
+    if victim:
+        record = next(
+            (r for r in tweet_records if main.slugify(r.get("person_name")) == main.slugify(victim["name"])),
+            record,
+        )
+    checks = {
+        "city": (result["city"], record.get("city"), lambda a, b: province_key(a) == province_key(b)),
+        "district": (result["district"], record.get("district"), lambda a, b: turkish_lower(a) == turkish_lower(b)),
+        "name": (
+            victim and victim["name"],
+            record.get("person_name"),
+            lambda a, b: main.slugify(a) == main.slugify(b),
+        ),
+        "age": (victim and victim["age_min"], record.get("age_min"), lambda a, b: a == b),
+        "date": (result["date"], record.get("date"), lambda a, b: a == b),
+        # What the record would store: no sector phrase means the default sector
+        "sector": (normalize_sector(result["sector_raw"]), record.get("sector"), lambda a, b: a == b),
+        # Lenient: the stored cause is a summary, so sharing one content word stem is enough
+        "cause": (result["cause"], record.get("cause"), lambda a, b: bool(_cause_stems(a) & _cause_stems(b))),
+    }
+    return {
+        field: same(predicted, expected)
+        for field, (predicted, expected, same) in checks.items()
+        if predicted is not None and expected is not None
+    }
+
+
+def evaluate(data, tweets, share=TEST_SHARE):
+    """
+    Scores the extractor on real tweet text: `tweets` ({id: (text, created_at)}, see
+    load_tweet_log) joined to the records they produced through `tweetId`. A stable
+    `share` of those tweets is held out; the gazetteer is learned from the other records
+    only. Returns per-field counts and one (confidence, accepted_at_0, all_correct) row
+    per held-out tweet the extractor produced a result for.
+    """
+    by_tweet = defaultdict(list)
+    for record in data:
+        if record.get("tweetId"):
+            by_tweet[str(record["tweetId"])].append(record)
+    held_out = [tweet_id for tweet_id in tweets if tweet_id in by_tweet and is_held_out(tweet_id, share)]
+    held_out_set = set(held_out)
+    learn_gazetteer([record for record in data if str(record.get("tweetId")) not in held_out_set])
+
+    stats = defaultdict(lambda: [0, 0])  # field -> [correct, predicted]
+    rows = []
+    for tweet_id in held_out:
+        text, created_at = tweets[tweet_id]
+        result = extract(text, created_at)
+        if not result:
+            continue
+        scores = _score(result, by_tweet[tweet_id])
+        for field, correct in scores.items():
+            stats[field][0] += correct
+            stats[field][1] += 1
+        rows.append((result["confidence"], is_confident(result, threshold=0), all(scores.values())))
+
+    return {
+        "logged": len(tweets),
+        "held_out": len(held_out),
+        "extracted": len(rows),
+        "fields": {field: {"correct": c, "predicted": p} for field, (c, p) in stats.items()},
+        "rows": rows,
+    }
+
+
+def precision_at(rows, threshold):
+    """(accepted, all fields correct) for the rows a threshold would accept."""
+    accepted = [correct for confidence, has_required, correct in rows if has_required and confidence >= threshold]
+    return len(accepted), sum(accepted)
+
+
+def recommend_threshold(rows, target=TARGET_PRECISION, min_support=30):
+    """Lowest threshold whose held-out precision reaches `target` on at least `min_support` tweets."""
+    for threshold in sorted({confidence for confidence, _, _ in rows}):
+        accepted, correct = precision_at(rows, threshold)
+        if accepted >= min_support and correct >= target * accepted:
+            return threshold
+    return None
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate the local rule-based extractor on held-out tweet text.")
+    parser.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    parser.add_argument("--tweets", default=TWEET_LOG, help="Tweet text log written by main.py.")
+    parser.add_argument("--test-share", type=float, default=TEST_SHARE, help="Share of logged tweets to hold out.")
+    parser.add_argument("--target-precision", type=float, default=TARGET_PRECISION,
+                        help="Precision the recommended threshold must reach.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    report = evaluate(records.load_records(args.input), load_tweet_log(args.tweets), args.test_share)
+    if not report["held_out"]:
+        raise SystemExit(
+            f"No held-out tweets: {args.tweets} has {report['logged']} tweets that match records in {args.input}. "
+            "main.py logs the text of every tweet it analyzes there."
+        )
+    print(f"Held out {report['held_out']} of {report['logged']} logged tweets; extracted {report['extracted']}.")
+    for field, counts in sorted(report["fields"].items()):
+        share = counts["correct"] / counts["predicted"] if counts["predicted"] else 0
+        print(f"  {field:<9} {counts['correct']}/{counts['predicted']} correct ({share:.0%})")
+    for threshold in sorted({confidence for confidence, _, _ in report["rows"]} | {CONFIDENCE_THRESHOLD}):
+        accepted, correct = precision_at(report["rows"], threshold)
+        share = correct / accepted if accepted else 0
+        marker = "  <- LOCAL_EXTRACT_THRESHOLD" if threshold == CONFIDENCE_THRESHOLD else ""
+        print(f"  threshold {threshold:.2f}: {accepted} accepted, {share:.0%} with every field correct{marker}")
+    recommended = recommend_threshold(report["rows"], args.target_precision)
+    if recommended is None:
+        print(f"No threshold reaches {args.target_precision:.0%} precision yet; keep the LLM for these tweets.")
+    else:
+        print(f"Lowest threshold with {args.target_precision:.0%} precision: {recommended:.2f}")
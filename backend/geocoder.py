@@ -5,15 +5,25 @@ import time
 # Initialize geocoder with a user agent
 geolocator = Nominatim(user_agent="isig_tweet_analyzer_v1")
 
-def get_coordinates(city, district=None, location_detail=None):
+# Successful lookups, kept for the life of the process (the daemon reuses them every cycle)
+_cache = {}
+
+def get_coordinates(city, district=None, location_detail=None, raise_on_error=False):
     """
     Returns (lat, lon) for a given location.
     Tries specific to general:
     1. City + District + Location Detail (if provided) - skipped usually as too specific
     2. City + District
     3. City
+    With raise_on_error, a lookup that failed on a timeout or service error (rather than
+    finding nothing) raises the last error instead of returning None.
     """
+    key = (city, district)
+    if key in _cache:
+        return list(_cache[key])
+
     search_queries = []
+    last_error = None
     
     if city and district:
         search_queries.append(f"{district}, {city}, Turkey")
@@ -25,13 +35,18 @@ def get_coordinates(city, district=None, location_detail=None):
         try:
             location = geolocator.geocode(query, timeout=10)
             if location:
+                _cache[key] = (location.latitude, location.longitude)
                 return [location.latitude, location.longitude]
             time.sleep(1) # Respect API rate limits
-        except GeocoderTimedOut:
+        except GeocoderTimedOut as e:
             print(f"Geocoding timed out for {query}")
+            last_error = e
             continue
         except Exception as e:
             print(f"Geocoding error for {query}: {e}")
+            last_error = e
             continue
-            
+
+    if raise_on_error and last_error:
+        raise last_error
     return None
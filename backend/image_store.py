@@ -0,0 +1,190 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import storage
+from profile_shards import shard_for
+
+
+IMAGES_DIR = Path("images")
+MANIFEST_DIR = IMAGES_DIR / "manifest"
+# Resized variants (widths in px); only those narrower than the original are written
+VARIANT_WIDTHS = (160, 480, 1080)
+PLACEHOLDER_WIDTH = 16
+JPEG_QUALITY = 82
+
+
+def content_dir(digest: str) -> Path:
+    """images/<aa>/<bb>/ for a content hash, so no directory holds more than a few files."""
+    return IMAGES_DIR / digest[:2] / digest[2:4]
+
+
+def _meta_path(image_path) -> Path:
+    path = Path(image_path)
+    return path.with_name(path.stem + ".json")
+
+
+def _render(data: bytes, original_path: Path, digest: str):
+    """Writes the resized variants and returns the metadata of one stored image."""
+    from PIL import Image, ImageOps  # Only the media stage needs Pillow
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    width, height = image.size
+
+    sizes = []
+    for variant_width in VARIANT_WIDTHS:
+        if variant_width >= width:
+            continue
+        variant_path = original_path.with_name(f"{digest}-{variant_width}.jpg")
+        if not variant_path.exists():
+            variant = image.resize((variant_width, max(1, round(height * variant_width / width))), Image.LANCZOS)
+            variant.save(variant_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        sizes.append([variant_width, variant_path.as_posix()])
+    sizes.append([width, original_path.as_posix()])
+
+    # A ~16px JPEG is a few hundred bytes; the browser scales and blurs it while the real image loads
+    tiny = image.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR)
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=50)
+    placeholder = "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return {"w": width, "h": height, "placeholder": placeholder, "sizes": sizes}
+
+
+def store(data: bytes, ext: str = ".jpg") -> str:
+    """
+    Stores image bytes under their content hash (images/<aa>/<bb>/<sha1><ext>) together
+    with resized variants and a <sha1>.json sidecar holding the intrinsic size, the blur
+    placeholder and the available sizes. Identical images are stored once.
+    Returns the relative posix path of the original.
+    """
+    digest = hashlib.sha1(data).hexdigest()
+    directory = content_dir(digest)
+    directory.mkdir(parents=True, exist_ok=True)
+    original_path = directory / f"{digest}{ext}"
+    if not original_path.exists():
+        with storage.atomic_open(original_path, "wb") as handle:
+            handle.write(data)
+
+    meta_path = _meta_path(original_path)
+    if not meta_path.exists():
+        try:
+            meta = _render(data, original_path, digest)
+        except Exception as exc:
+            # Keep the original; the manifest simply has no entry for it
+            print(f"Could not render variants for {original_path}: {exc}")
+        else:
+            storage.atomic_write_json(meta_path, meta, ensure_ascii=False, separators=(",", ":"))
+    return original_path.as_posix()
+
+
+def read_meta(image_path):
+    if not image_path:
+        return None
+    try:
+        with open(_meta_path(image_path), "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def build_manifest(entries):
+    """{shard: {record id: image metadata}} for every record whose image has a sidecar."""
+    shards = {}
+    for record in entries:
+        person_id = record.get("id")
+        meta = read_meta(record.get("image"))
+        if person_id and meta:
+            shards.setdefault(shard_for(person_id), {})[person_id] = meta
+    return shards
+
+
+def write_manifest(entries, out_dir=None):
+    """
+    Writes images/manifest/<shard>.json (same shard function as the profile shards), so a
+    map popup downloads only the small shard of its own record. Unchanged shards are not
+    rewritten. Returns (written, removed).
+    """
+    out_dir = Path(out_dir or MANIFEST_DIR)
+    shards = build_manifest(entries)
+    written = 0
+    for shard, payload in shards.items():
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        dest = out_dir / f"{shard}.json"
+        if dest.exists() and dest.read_text(encoding="utf-8") == body:
+            continue
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with storage.atomic_open(dest) as handle:
+            handle.write(body)
+        written += 1
+
+    removed = 0
+    if out_dir.exists():
+        for stale in out_dir.glob("*.json"):
+            if stale.stem not in shards:
+                os.remove(stale)
+                removed += 1
+    return written, removed
+
+
+def migrate(entries, dry_run=False):
+    """
+    Moves images from the old flat images/<tweetId>-<n>.jpg layout into the hashed layout
+    and points each record's `image` at the new path. Returns (migrated records, the flat
+    files that were copied).
+    """
+    migrated = 0
+    moved = {}
+    for record in entries:
+        path = record.get("image")
+        if not path or Path(path).parent != IMAGES_DIR or not os.path.exists(path):
+            continue
+        if path not in moved:
+            if dry_run:
+                moved[path] = path
+            else:
+                with open(path, "rb") as handle:
+                    moved[path] = store(handle.read(), Path(path).suffix.lower() or ".jpg")
+        record["image"] = moved[path]
+        migrated += 1
+    return migrated, sorted(moved)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hashed multi-size image layout and its manifest.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("manifest", help="Rebuild images/manifest/ from data.json.")
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Move flat images/ files into the hashed layout, render sizes and update data.json.",
+    )
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only report what would move.")
+    migrate_parser.add_argument("--keep-originals", action="store_true", help="Do not delete the flat files.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import main
+
+    args = _parse_args()
+    data = main.load_data()
+    if args.command == "manifest":
+        written, removed = write_manifest(data)
+        print(f"Image manifest: {written} shards written, {removed} removed.")
+    else:
+        migrated, flat_files = migrate(data, dry_run=args.dry_run)
+        print(f"{migrated} records reference {len(flat_files)} flat images.")
+        if not args.dry_run and migrated:
+            data = main.save_data(data)
+            if not args.keep_originals:
+                # Another writer may still have added a record pointing at a flat file
+                still_used = {record.get("image") for record in data}
+                for path in flat_files:
+                    if path not in still_used:
+                        os.remove(path)
+            print("Migrated images and updated data.json.")
@@ -1,67 +1,106 @@
+import argparse
 import asyncio
 import json
 import os
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 import re
 import unicodedata
 
-import scraper
-import analyzer
-import geocoder
-import media_downloader
+# Network-bound service modules (scraper, analyzer, geocoder, media_downloader) are
+# imported inside the functions that use them, so offline commands start instantly.
+import boundaries
+import extractor
+import image_store
+import profile_shards
+import records
+import retry_queue
+import search_index
+import usage
+import storage
+import threads
+from sectors import SECTOR_CATEGORIES, SECTOR_KEYWORDS, normalize_sector
 
 DATA_FILE = 'data.json'
+DEFAULT_COORDS = [39.0, 35.0]
 FETCH_LIMIT = int(os.getenv("FETCH_LIMIT", "500"))
 BATCH_LIMIT = int(os.getenv("AUTO_BATCH_LIMIT", os.getenv("FETCH_LIMIT", "250")))
 MAX_BATCHES = int(os.getenv("AUTO_MAX_BATCHES", "40"))
+# Continue the timeline from the cursor saved by the previous run (scraper_state.json)
+RESUME_TIMELINE = os.getenv("RESUME_TIMELINE", "").lower() == "true"
 
 # Search mode: use date ranges to bypass 3200 limit
 SEARCH_MODE = os.getenv("SEARCH_MODE", "").lower() == "true"
 SEARCH_SINCE = os.getenv("SEARCH_SINCE")  # YYYY-MM-DD
 SEARCH_UNTIL = os.getenv("SEARCH_UNTIL")  # YYYY-MM-DD
+# Continue the same search query from its saved cursor instead of its newest page
+RESUME_SEARCH = os.getenv("RESUME_SEARCH", "").lower() == "true"
 
-SECTOR_CATEGORIES = [
-    "İnşaat, Yol",
-    "Taşımacılık",
-    "Diğer İşkolları",
-    "Tarım, Orman (İşçi)",
-    "Tarım, Orman (Çiftçi)",
-    "Ticaret, Büro",
-    "Madencilik",
-    "Belediye, Genel İşler",
-    "Kimya",
-    "Metal",
-    "Konaklama",
-]
-
-# Simple keyword mapping to the canonical list above
-SECTOR_KEYWORDS = [
-    ("İnşaat, Yol", ["inşaat", "şantiye", "yol", "tünel", "köprü"]),
-    ("Taşımacılık", ["kargo", "lojistik", "şoför", "nakliye", "otobüs", "kamyon", "taksi", "şöför", "havaalanı"]),
-    ("Tarım, Orman (İşçi)", ["tarım", "fındık", "pamuk", "mevsimlik", "sera", "orman işçisi"]),
-    ("Tarım, Orman (Çiftçi)", ["çiftçi", "biçerdöver", "traktör"]),
-    ("Ticaret, Büro", ["ofis", "büro", "mağaza", "market", "kasiyer", "satış"]),
-    ("Madencilik", ["maden", "ocak", "kömür", "lignit"]),
-    ("Belediye, Genel İşler", ["belediye", "temizlik işçisi", "itfaiye", "zabıta"]),
-    ("Kimya", ["kimya", "petrokimya", "gübre", "asits", "solvent", "boya"]),
-    ("Metal", ["metal", "döküm", "kaynak", "çelik", "fabrika", "sanayi", "endüstriyel"]),
-    ("Konaklama", ["otel", "pansiyon", "restoran", "lokanta", "aşçı", "garson"]),
-]
+# Daemon mode: poll for tweets newer than the last seen id
+DAEMON_INTERVAL = int(os.getenv("DAEMON_INTERVAL", "300"))
+DAEMON_STATE_FILE = 'daemon_state.json'
+
+# Keys and content hashes of the records as loaded; save_data commits only the difference
+_loaded_snapshot = {}
+
+def record_signature(record):
+    return build_signature(record.get('person_name'), record.get('date'), record.get('city'))
 
 def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
-    return []
+    """Streams data.json into compact Record objects (see records.py)."""
+    global _loaded_snapshot
+    try:
+        data = records.load_records(DATA_FILE)
+    except (json.JSONDecodeError, ValueError):
+        data = []
+    _loaded_snapshot = storage.snapshot(data, record_signature)
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """
+    Merge-on-commit: under a file lock, re-reads data.json and applies only the records
+    this process added or changed since load_data, so parallel workers don't lose each
+    other's additions. Returns the merged dataset.
+    """
+    global _loaded_snapshot
+    updated, appended = storage.commit(DATA_FILE, data, _loaded_snapshot, record_signature)
+    if updated or appended:
+        print(f"Committed {appended} new and {updated} updated records to {DATA_FILE}.")
+    data = records.load_records(DATA_FILE)
+    _loaded_snapshot = storage.snapshot(data, record_signature)
+    refresh_derived(data)
+    return data
 
 
+def refresh_derived(data=None, path=None):
+    """
+    Regenerates everything the site derives from data.json (profile shards, image
+    manifest, search index, province counts). Every writer of data.json calls this after
+    its commit; writes to any other path are left alone.
+    """
+    if path is not None and os.path.abspath(path) != os.path.abspath(DATA_FILE):
+        return
+    if data is None:
+        data = records.load_records(DATA_FILE)
+
+    # Derived outputs get their own lock; the data lock is not re-entrant
+    with storage.file_lock(f"{DATA_FILE}.derived"):
+        written, removed = profile_shards.write_shards(data)
+        if written or removed:
+            print(f"Profile shards: {written} written, {removed} removed.")
+        written, removed = image_store.write_manifest(data)
+        if written or removed:
+            print(f"Image manifest: {written} shards written, {removed} removed.")
+        written, removed = search_index.write_index(data)
+        if written or removed:
+            print(f"Search index: {written} files written, {removed} removed.")
+        index = boundaries.get_index()
+        if index:
+            boundaries.write_counts(data, index)
+
+
+@lru_cache(maxsize=None)
 def slugify(value: str) -> str:
     """Create URL-safe slugs for person ids."""
     if not value:
@@ -71,15 +110,6 @@ def slugify(value: str) -> str:
     value = re.sub(r"[^a-zA-Z0-9]+", "-", value).strip("-").lower()
     return value or "isimsiz"
 
-def normalize_sector(raw_sector: str) -> str:
-    if not raw_sector:
-        return "Diğer İşkolları"
-    text = raw_sector.lower()
-    for target, keywords in SECTOR_KEYWORDS:
-        if any(kw in text for kw in keywords):
-            return target
-    return "Diğer İşkolları"
-
 def to_int(value):
     try:
         return int(value)
@@ -104,6 +134,12 @@ def build_signature(name, date_str, city):
     ]
     return "|".join(parts)
 
+def build_person_id(name, date_str, city):
+    slug_base = slugify(name)
+    date_suffix = re.sub(r"[^0-9]", "", date_str or "") or "nodate"
+    city_slug = slugify(city) if city else "nocity"
+    return f"person-{slug_base}-{city_slug}-{date_suffix}"
+
 def parse_age_fields(victim: dict):
     """Return (age_display, age_min, age_max) from victim data."""
     age = victim.get("age")
@@ -140,6 +176,49 @@ def parse_age_fields(victim: dict):
 
     return age_display, age_min, age_max
 
+def resolve_coords(coords, city):
+    """
+    Validates geocoded coords against the vendored province polygon of the stated city.
+    Missing coords, or coords clearly inside another province, fall back to a point
+    inside that province, and only to DEFAULT_COORDS when the city is unknown.
+    Every fallback is reported.
+    """
+    index = boundaries.get_index()
+    province = index.province_for_city(city) if index else None
+
+    located = index.misplaced(coords, province) if coords and province else None
+    if located:
+        print(f"Geocoded coords {coords} are in {located.name}, not {city}; using a point inside the province.")
+        return province.representative_point()
+    if coords:
+        return coords
+    if province:
+        print(f"No coordinates for {city}; using a point inside the province.")
+        return province.representative_point()
+    print(f"No coordinates for {city}; falling back to {DEFAULT_COORDS}.")
+    return list(DEFAULT_COORDS)
+
+def analyze_with_cascade(tweet_text, tweet_date_str, ref=None):
+    """
+    Tries the local rule-based extractor first and only calls Deepseek when its
+    confidence is below extractor.CONFIDENCE_THRESHOLD or required fields are missing.
+    Once the run's token/cost budget is used up (usage.py), BUDGET_ACTION=downgrade
+    accepts local results that pass extractor.is_downgrade_safe; everything else raises
+    usage.BudgetExceeded, which process_tweets turns into a retry-queue entry.
+    """
+    import analyzer
+
+    local_result = extractor.extract(tweet_text, tweet_date_str)
+    if extractor.is_confident(local_result):
+        print(f"Local extractor accepted (confidence {local_result['confidence']:.2f}); skipping Deepseek.")
+        return local_result
+    if usage.budget_exceeded() and usage.BUDGET_ACTION == "downgrade":
+        if extractor.is_downgrade_safe(local_result, tweet_text, tweet_date_str):
+            print(f"Deepseek budget reached; using the local result (confidence {local_result['confidence']:.2f}).")
+            return local_result
+        raise usage.BudgetExceeded(usage.budget_status())
+    return analyzer.analyze_tweet(tweet_text, tweet_date_str, raise_on_error=True, ref=ref)
+
 def is_sparse_chain_tweet(analysis_result: dict, tweet_text: str) -> bool:
     """Heuristic: skip image-only or name-only follow-up tweets with no incident detail."""
     if not analysis_result:
@@ -173,17 +252,56 @@ def has_sufficient_data(analysis_result: dict) -> bool:
     
     return has_location and (has_cause or has_details)
 
-def process_tweets(tweets, all_data, signature_map):
-    """Process a batch of tweets and add entries to all_data. Returns count of new entries."""
+def _unit_for_retry(tweet):
+    """JSON-safe copy of an analysis unit, enough to run it through process_tweets again."""
+    import media_downloader
+
+    tweet_id = str(tweet['id'])
+    return {
+        "id": tweet_id,
+        "text": tweet.get('text'),
+        "created_at": str(tweet.get('created_at')),
+        "url": tweet.get('url'),
+        "thread_ids": list(tweet.get('thread_ids') or [tweet_id]),
+        "media_by_tweet": [
+            [media_tweet_id, media_downloader.extract_media_urls(media)]
+            for media_tweet_id, media in tweet.get('media_by_tweet') or []
+        ],
+    }
+
+def process_tweets(tweets, all_data, signature_map, raise_analysis_errors=False):
+    """
+    Process a batch of tweets and add entries to all_data. Returns count of new entries.
+    Failed analysis, geocoding and media downloads are recorded in the retry queue
+    (see retry_queue.py) instead of being lost; with raise_analysis_errors an analysis
+    failure propagates instead.
+    """
+    import geocoder
+    import media_downloader
+
+    extractor.learn_gazetteer(all_data)
+
     total_new = 0
     updated_existing = False
     
-    for tweet in tweets:
+    for tweet in threads.group_threads(tweets):
         tweet_id = str(tweet['id'])
-        print(f"Analyzing tweet {tweet_id}...")
+        thread_ids = tweet.get('thread_ids') or [tweet_id]
+        if len(thread_ids) > 1:
+            print(f"Analyzing thread {tweet_id} ({len(thread_ids)} tweets)...")
+        else:
+            print(f"Analyzing tweet {tweet_id}...")
         
-        # Analyze with Deepseek
-        analysis_result = analyzer.analyze_tweet(tweet['text'], str(tweet['created_at']))
+        # Local extractor first, Deepseek when it is not confident
+        extractor.log_tweet(tweet_id, tweet['text'], tweet['created_at'])
+        try:
+            analysis_result = analyze_with_cascade(tweet['text'], str(tweet['created_at']), ref=f"tweet-{tweet_id}")
+        except Exception as e:
+            if raise_analysis_errors:
+                raise
+            retry_queue.record_failure("analyze", tweet_id, _unit_for_retry(tweet), e)
+            print(f"Analysis of tweet {tweet_id} failed; queued for retry.")
+            continue
         
         if not analysis_result or not analysis_result.get("is_incident"):
             print(f"Tweet {tweet_id} not relevant.")
@@ -212,22 +330,34 @@ def process_tweets(tweets, all_data, signature_map):
         cause = analysis_result.get('cause')
         details = analysis_result.get('details')
 
-        coords = geocoder.get_coordinates(city, district)
-        if not coords:
-            coords = [39.0, 35.0]
-
-        # Prepare media downloads (if any)
-        image_path, image_url = media_downloader.download_first_image(
-            tweet.get('media'), tweet_id
+        try:
+            geocoded, geocode_error = geocoder.get_coordinates(city, district, raise_on_error=True), None
+        except Exception as e:
+            geocoded, geocode_error = None, e
+        coords = resolve_coords(geocoded, city)
+
+        # Media from the whole chain; one image per victim when the counts line up
+        media_errors = []
+        images = media_downloader.download_thread_images(
+            tweet.get('media_by_tweet') or [(tweet_id, tweet.get('media'))],
+            limit=None if len(victims) > 1 else 1,
+            on_error=lambda *failure: media_errors.append(failure),
         )
+        per_victim_images = len(victims) > 1 and len(images) == len(victims)
 
         incident_id = f"incident-{tweet_id}"
         multi_victim = len(victims) > 1
+        new_ids = []
+        missing_images = {}  # remote url -> ids of the records left without the image
 
         for idx, victim in enumerate(victims):
             if not isinstance(victim, dict):
                 continue
             name = victim.get("name") or "İsimsiz İşçi"
+            if per_victim_images:
+                image_path, image_url = images[idx]
+            else:
+                image_path, image_url = images[0] if images else (None, None)
             age_display, age_min, age_max = parse_age_fields(victim)
             gender = normalize_gender(victim.get("gender"))
 
@@ -236,15 +366,12 @@ def process_tweets(tweets, all_data, signature_map):
             if signature in signature_map:
                 existing = signature_map[signature]
                 related = set(existing.get("related_tweet_ids") or [])
-                related.add(tweet_id)
+                related.update(thread_ids)
                 existing["related_tweet_ids"] = sorted(list(related))
                 updated_existing = True
                 continue
 
-            slug_base = slugify(name)
-            date_suffix = re.sub(r"[^0-9]", "", date_str or "") or "nodate"
-            city_slug = slugify(city) if city else "nocity"
-            person_id = f"person-{slug_base}-{city_slug}-{date_suffix}"
+            person_id = build_person_id(name, date_str, city)
 
             entry = {
                 "id": person_id,
@@ -268,15 +395,29 @@ def process_tweets(tweets, all_data, signature_map):
                 "addedAt": datetime.now().isoformat(),
                 "image": image_path,
                 "imageUrl": image_url,
-                "related_tweet_ids": [tweet_id],
+                "related_tweet_ids": list(thread_ids),
                 "victim_group_id": incident_id,
                 "incident_id": incident_id,
                 "multi_victim": multi_victim,
             }
 
-            all_data.append(entry)
-            signature_map[signature] = entry
+            record = records.Record.from_dict(entry)
+            all_data.append(record)
+            signature_map[signature] = record
             total_new += 1
+            new_ids.append(person_id)
+            if image_url and not image_path:
+                missing_images.setdefault(image_url, []).append(person_id)
+
+        for url, media_tweet_id, index, error in media_errors:
+            if url in missing_images:
+                inputs = {"url": url, "tweet_id": media_tweet_id, "index": index}
+                retry_queue.record_failure("media", url, inputs, error, missing_images[url])
+                print(f"Image {url} queued for retry.")
+        if geocode_error and new_ids:
+            inputs = {"city": city, "district": district, "fallback_coords": list(coords)}
+            retry_queue.record_failure("geocode", tweet_id, inputs, geocode_error, new_ids)
+            print(f"Geocoding for tweet {tweet_id} queued for retry.")
 
     return total_new, updated_existing
 
@@ -285,9 +426,10 @@ async def main_search_mode():
     """Search-based fetching: uses date ranges to bypass 3200 limit."""
     print("Starting ISIG Tweet Analyzer Pipeline (SEARCH MODE)...")
     print(f"Date range: {SEARCH_SINCE} to {SEARCH_UNTIL}")
+    import scraper
     
     all_data = load_data()
-    signature_map = {build_signature(item.get('person_name'), item.get('date'), item.get('city')): item for item in all_data}
+    signature_map = {record_signature(item): item for item in all_data}
     print(f"Loaded {len(all_data)} existing person records.")
     
     total_new = 0
@@ -297,7 +439,8 @@ async def main_search_mode():
         tweets = await scraper.fetch_tweets_by_search(
             since=SEARCH_SINCE,
             until=SEARCH_UNTIL,
-            limit=FETCH_LIMIT
+            limit=FETCH_LIMIT,
+            resume=RESUME_SEARCH,
         )
     except Exception as e:
         print(f"Failed to fetch tweets: {e}")
@@ -319,14 +462,16 @@ async def main_search_mode():
     if updated_existing:
         print("Updated related_tweet_ids for some existing entries.")
     print(f"Total records now: {len(all_data)}")
+    print(f"Deepseek usage: {usage.budget_status()}")
 
 
 async def main_timeline_mode():
     """Legacy timeline-based fetching (limited to ~3200 recent tweets)."""
     print("Starting ISIG Tweet Analyzer Pipeline (TIMELINE MODE)...")
+    import scraper
     
     all_data = load_data()
-    signature_map = {build_signature(item.get('person_name'), item.get('date'), item.get('city')): item for item in all_data}
+    signature_map = {record_signature(item): item for item in all_data}
     print(f"Loaded {len(all_data)} existing person records.")
 
     start_before_env = os.getenv("START_BEFORE_TWEET_ID")
@@ -340,7 +485,12 @@ async def main_timeline_mode():
         batches_run += 1
         print(f"\n=== Batch {batches_run} (limit {BATCH_LIMIT}) start_before={start_before} ===")
         try:
-            tweets = await scraper.fetch_tweets(limit=BATCH_LIMIT, start_before=start_before)
+            # Later batches continue from the session's cursor instead of re-walking earlier pages
+            tweets = await scraper.fetch_tweets(
+                limit=BATCH_LIMIT,
+                start_before=start_before,
+                resume=RESUME_TIMELINE or batches_run > 1,
+            )
         except Exception as e:
             print(f"Failed to fetch tweets: {e}")
             break
@@ -374,6 +524,217 @@ async def main_timeline_mode():
     if updated_existing:
         print("Updated related_tweet_ids for some existing entries.")
     print(f"Total records now: {len(all_data)}")
+    print(f"Deepseek usage: {usage.budget_status()}")
+
+
+def latest_tweet_id(data):
+    """Highest tweet id referenced by any record (0 for an empty dataset)."""
+    latest = 0
+    for record in data:
+        for tweet_id in [record.get("tweetId"), *(record.get("related_tweet_ids") or [])]:
+            if tweet_id and str(tweet_id).isdigit():
+                latest = max(latest, int(tweet_id))
+    return latest
+
+
+def _data_mtime():
+    try:
+        return os.stat(DATA_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_daemon_state():
+    try:
+        with open(DAEMON_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+async def main_daemon(interval=DAEMON_INTERVAL, once=False):
+    """
+    Long-running incremental mode. The twikit client, geocoder and Deepseek clients,
+    the loaded records and the signature map stay in memory between cycles; data.json
+    is re-read only when another writer changed it. Each cycle fetches only tweets newer
+    than the last seen id, so an idle cycle is one timeline request and a stat().
+    """
+    print(f"Starting ISIG Tweet Analyzer Pipeline (DAEMON MODE, every {interval}s)...")
+    import scraper
+
+    state = _load_daemon_state()
+    all_data = None
+    signature_map = {}
+    loaded_mtime = None
+    last_seen = int(state.get("last_seen_id") or 0)
+
+    while True:
+        started = time.perf_counter()
+        usage.start_run()
+        try:
+            mtime = _data_mtime()
+            if all_data is None or mtime != loaded_mtime:
+                all_data = load_data()
+                signature_map = {record_signature(item): item for item in all_data}
+                loaded_mtime = mtime
+                if not last_seen:
+                    # data.json's newest id is only a starting point; it is not gap-free
+                    last_seen = latest_tweet_id(all_data)
+                print(f"Loaded {len(all_data)} person records; last seen tweet {last_seen}.")
+
+            tweets, complete = await scraper.fetch_tweets_since(last_seen, limit=FETCH_LIMIT)
+            if tweets and not complete:
+                print(f"Timeline ended before tweet {last_seen}; tweets in between cannot be fetched from it.")
+            if tweets:
+                # Oldest first in chunks; last_seen only ever moves past a fully processed,
+                # gap-free prefix, so a failure mid-backlog resumes where it stopped
+                for start in range(0, len(tweets), FETCH_LIMIT):
+                    chunk = tweets[start:start + FETCH_LIMIT]
+                    new_count, updated = process_tweets(chunk, all_data, signature_map)
+                    if new_count or updated:
+                        all_data = save_data(all_data)
+                        signature_map = {record_signature(item): item for item in all_data}
+                        loaded_mtime = _data_mtime()
+                        print(f"Added {new_count} new person entries; total {len(all_data)}.")
+
+                    last_seen = max(last_seen, int(chunk[-1]['id']))
+                    state.update(last_seen_id=str(last_seen), updated_at=datetime.now().isoformat())
+                    storage.atomic_write_json(DAEMON_STATE_FILE, state, ensure_ascii=False, indent=2)
+            else:
+                print(f"[{datetime.now().isoformat(timespec='seconds')}] No new tweets.")
+        except Exception as e:
+            print(f"Daemon cycle failed: {e}")
+            import traceback
+            traceback.print_exc()
+
+        if once:
+            break
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def main_retry_failed(force=False):
+    """
+    Re-runs only the queued analyze / geocode / media failures whose backoff has elapsed,
+    patches the affected records and commits them. Items that fail again are re-queued
+    with a longer backoff; items out of attempts are listed but not retried.
+    """
+    import geocoder
+    import media_downloader
+
+    queued = retry_queue.load()
+    exhausted = retry_queue.exhausted(queued)
+    if exhausted:
+        print(f"{len(exhausted)} queued failures used all {retry_queue.MAX_ATTEMPTS} attempts and are no longer retried:")
+        for item in exhausted:
+            print(f"  {item['stage']} {item['key']} ({item['attempts']} attempts, last error {item['error']})")
+
+    items = retry_queue.due(queued, force=force)
+    if not items:
+        print("No queued failures are due for retry.")
+        return
+
+    all_data = load_data()
+    signature_map = {record_signature(item): item for item in all_data}
+    by_id = {record.get("id"): record for record in all_data}
+    resolved = 0
+
+    for item in items:
+        stage, key, inputs = item["stage"], item["key"], item["inputs"]
+        print(f"Retrying {stage} {key} (attempt {item['attempts'] + 1}, last error {item['error']})...")
+        try:
+            if stage == "analyze":
+                process_tweets([inputs], all_data, signature_map, raise_analysis_errors=True)
+            elif stage == "geocode":
+                coords = geocoder.get_coordinates(inputs["city"], inputs["district"], raise_on_error=True)
+                if coords:
+                    coords = resolve_coords(coords, inputs["city"])
+                    for record_id in item["record_ids"]:
+                        record = by_id.get(record_id)
+                        # Leave records whose coords were corrected by hand in the meantime
+                        if record is not None and list(record.get("coords") or []) == inputs["fallback_coords"]:
+                            record["coords"] = coords
+            elif stage == "media":
+                local_path = media_downloader.download_media(
+                    inputs["url"], inputs["tweet_id"], inputs["index"], raise_on_error=True
+                )
+                for record_id in item["record_ids"]:
+                    record = by_id.get(record_id)
+                    if record is not None and not record.get("image") and record.get("imageUrl") == inputs["url"]:
+                        record["image"] = local_path
+        except Exception as e:
+            failed = retry_queue.record_failure(stage, key, inputs, e)
+            print(f"  Failed again; next attempt in {retry_queue.backoff(failed['attempts'])}s.")
+            continue
+        retry_queue.resolve(stage, key)
+        resolved += 1
+
+    save_data(all_data)
+    print(f"Resolved {resolved} of {len(items)} queued failures.")
+
+
+def rebuild_records(data):
+    """
+    Re-derives age/age_min/age_max, gender, sector and id for every record in one pass.
+    Needs no network. Returns a dict of per-field change counts plus duplicate signatures.
+    """
+    changes = {"age": 0, "gender": 0, "sector": 0, "id": 0}
+    seen_signatures = {}
+    duplicates = []
+
+    for record in data:
+        age_display, age_min, age_max = parse_age_fields(record)
+        if (record.get("age"), record.get("age_min"), record.get("age_max")) != (age_display, age_min, age_max):
+            record["age"] = age_display
+            record["age_min"] = age_min
+            record["age_max"] = age_max
+            changes["age"] += 1
+
+        gender = normalize_gender(record.get("gender"))
+        if record.get("gender") != gender:
+            record["gender"] = gender
+            changes["gender"] += 1
+
+        if record.get("sector_raw"):
+            sector = normalize_sector(record.get("sector_raw"))
+            if record.get("sector") != sector:
+                record["sector"] = sector
+                changes["sector"] += 1
+
+        name = record.get("person_name")
+        date_str = record.get("date")
+        city = record.get("city")
+        person_id = build_person_id(name, date_str, city)
+        if record.get("id") != person_id:
+            record["id"] = person_id
+            changes["id"] += 1
+
+        signature = build_signature(name, date_str, city)
+        if signature in seen_signatures:
+            duplicates.append((seen_signatures[signature], record.get("id")))
+        else:
+            seen_signatures[signature] = record.get("id")
+
+    changes["duplicates"] = duplicates
+    return changes
+
+
+def main_rebuild(dry_run=False):
+    """Offline mode: re-derive computed fields over the existing data.json."""
+    started = time.perf_counter()
+    all_data = load_data()
+    changes = rebuild_records(all_data)
+    elapsed = time.perf_counter() - started
+
+    changed = sum(v for k, v in changes.items() if k != "duplicates")
+    print(f"Rebuilt {len(all_data)} records in {elapsed * 1000:.0f} ms.")
+    for field in ("age", "gender", "sector", "id"):
+        print(f"  {field}: {changes[field]} changed")
+    for first, second in changes["duplicates"]:
+        print(f"  duplicate signature: {first} / {second}")
+
+    if changed and not dry_run:
+        save_data(all_data)
+        print(f"Saved to {DATA_FILE}.")
 
 
 async def main():
@@ -382,5 +743,43 @@ async def main():
     else:
         await main_timeline_mode()
 
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ISIG tweet analyzer pipeline.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "fetch",
+        help="Fetch and analyze new tweets (default). Mode is chosen via SEARCH_* env vars.",
+    )
+    rebuild = subparsers.add_parser(
+        "rebuild",
+        help="Offline: re-derive age, gender, sector and ids over existing data.",
+    )
+    rebuild.add_argument("--dry-run", action="store_true", help="Report changes without saving.")
+    retry = subparsers.add_parser(
+        "retry-failed",
+        help="Re-run queued analyze/geocode/media failures and patch the affected records.",
+    )
+    retry.add_argument("--force", action="store_true", help="Ignore the backoff schedule.")
+    daemon = subparsers.add_parser(
+        "daemon",
+        help="Keep running and ingest tweets newer than the last seen tweetId on an interval.",
+    )
+    daemon.add_argument("--interval", type=int, default=DAEMON_INTERVAL, help="Seconds between polls.")
+    daemon.add_argument("--once", action="store_true", help="Run a single cycle and exit.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = _parse_args()
+    if args.command == "rebuild":
+        main_rebuild(dry_run=args.dry_run)
+    elif args.command == "retry-failed":
+        main_retry_failed(force=args.force)
+    elif args.command == "daemon":
+        try:
+            asyncio.run(main_daemon(interval=args.interval, once=args.once))
+        except KeyboardInterrupt:
+            print("Daemon stopped.")
+    else:
+        asyncio.run(main())
@@ -4,6 +4,7 @@ from urllib.parse import urlparse
 
 import requests
 
+import image_store
 
 IMAGES_DIR = Path("images")
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
@@ -16,6 +17,10 @@ def _pick_media_url(media_item):
     if not media_item:
         return None
 
+    # Already a URL (e.g. media stored in the retry queue)
+    if isinstance(media_item, str):
+        return media_item
+
     candidate_keys = [
         "media_url_https",
         "media_url",
@@ -60,29 +65,28 @@ def _extension_from_url(url: str) -> str:
     return ".jpg"
 
 
-def download_media(url: str, tweet_id: str, index: int = 0):
+def download_media(url: str, tweet_id: str, index: int = 0, raise_on_error: bool = False):
     """
-    Downloads a single media URL to images/ and returns the relative path.
+    Downloads a single media URL into the hashed images/ layout (see image_store.py), which
+    also renders the smaller sizes and the blur placeholder, and returns the relative path
+    of the original. tweet_id and index are only used for logging.
+    Failures return None, or propagate with raise_on_error.
     """
     _ensure_images_dir()
     ext = _extension_from_url(url)
-    filename = f"{tweet_id}-{index + 1}{ext}"
-    dest_path = IMAGES_DIR / filename
 
     try:
         with requests.get(url, timeout=20, stream=True) as response:
             response.raise_for_status()
-            with open(dest_path, "wb") as handle:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        handle.write(chunk)
+            content = b"".join(chunk for chunk in response.iter_content(chunk_size=8192) if chunk)
+        # Return as a posix-style relative path for JSON/site usage
+        return image_store.store(content, ext)
     except Exception as exc:
-        print(f"Failed to download media {url}: {exc}")
+        print(f"Failed to download media {url} (tweet {tweet_id}, #{index + 1}): {exc}")
+        if raise_on_error:
+            raise
         return None
 
-    # Return as a posix-style relative path for JSON/site usage
-    return dest_path.as_posix()
-
 
 def download_first_image(media_list, tweet_id: str):
     """
@@ -95,3 +99,25 @@ def download_first_image(media_list, tweet_id: str):
     remote_url = urls[0]
     local_path = download_media(remote_url, tweet_id, index=0)
     return local_path, remote_url
+
+
+def download_thread_images(media_by_tweet, limit=None, on_error=None):
+    """
+    Downloads the images of a reply chain. media_by_tweet is a list of (tweet_id, media_list)
+    as produced by threads.group_threads. Returns up to `limit` (local_path, remote_url) pairs
+    in chain order; local_path is None when a download failed, and on_error(url, tweet_id,
+    index, exc) is called for it.
+    """
+    images = []
+    for tweet_id, media_list in media_by_tweet or []:
+        for index, url in enumerate(extract_media_urls(media_list)):
+            if limit is not None and len(images) >= limit:
+                return images
+            try:
+                local_path = download_media(url, tweet_id, index=index, raise_on_error=True)
+            except Exception as exc:
+                local_path = None
+                if on_error:
+                    on_error(url, tweet_id, index, exc)
+            images.append((local_path, url))
+    return images
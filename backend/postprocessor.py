@@ -6,6 +6,11 @@ from copy import deepcopy
 from dotenv import load_dotenv
 
 import analyzer
+import records
+import schema
+import storage
+import usage
+from main import record_signature, refresh_derived
 
 
 load_dotenv()
@@ -61,18 +66,6 @@ def _needs_review(entry: dict) -> bool:
     return missing_core or missing_victims or garbled_text
 
 
-def _clean_model_response(text: str) -> str:
-    """Strip code fences and whitespace."""
-    content = text.strip()
-    if content.startswith("```json"):
-        content = content[7:]
-    if content.startswith("```"):
-        content = content[3:]
-    if content.endswith("```"):
-        content = content[:-3]
-    return content.strip()
-
-
 def auto_edit_entry(entry: dict):
     """
     Uses Deepseek to automatically tidy a single entry.
@@ -91,26 +84,34 @@ def auto_edit_entry(entry: dict):
         "tweetText": entry.get("tweetText"),
     }
 
+    user_content = json.dumps(payload, ensure_ascii=False, default=records.to_jsonable)
     try:
         response = client.chat.completions.create(
             model="deepseek-chat",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+                {"role": "user", "content": user_content},
             ],
             temperature=0.1,
         )
     except Exception as exc:
         print(f"Deepseek cleanup failed for {entry.get('id')}: {exc}")
         return None
+    usage.record("auto_edit", response, SYSTEM_PROMPT, user_content, ref=entry.get("id"))
 
-    content = _clean_model_response(response.choices[0].message.content)
-
+    content = response.choices[0].message.content
     try:
-        model_entry = json.loads(content)
-    except json.JSONDecodeError:
+        model_entry = schema.parse_and_validate(
+            content,
+            schema.EDIT_SCHEMA,
+            reask=lambda messages: analyzer.reask(messages, stage="auto_edit_reask", ref=entry.get("id")),
+            context=f"Tweet: {entry.get('tweetText') or ''}",
+        )
+    except ValueError:
         print(f"Model returned non-JSON for {entry.get('id')}: {content[:120]}")
         return None
+    if not model_entry:
+        return None
 
     # Merge while protecting immutable fields
     updated = deepcopy(entry)
@@ -137,30 +138,28 @@ def process_dataset(
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"{input_path} not found.")
 
-    with open(input_path, "r", encoding="utf-8") as handle:
-        data = json.load(handle)
-
-    updated = []
-    edited = 0
-    for idx, entry in enumerate(data):
-        if limit is not None and edited >= limit:
-            updated.append(entry)
-            continue
-
-        if force_all or _needs_review(entry):
-            cleaned = auto_edit_entry(entry)
-            if cleaned:
-                updated.append(cleaned)
-                edited += 1
-                continue
-
-        updated.append(entry)
+    # Only edited entries are kept in memory; they are merged into the file under its lock,
+    # so main.py can keep adding records while this runs.
+    updates = {}
+    with open(input_path, "r", encoding="utf-8") as source:
+        for entry in records.iter_json_array(source):
+            if limit is not None and len(updates) >= limit:
+                break
+            if usage.budget_exceeded():
+                print(f"Deepseek budget reached, stopping: {usage.budget_status()}")
+                break
+            if force_all or _needs_review(entry):
+                cleaned = auto_edit_entry(entry)
+                if cleaned:
+                    updates[storage.update_key(entry, record_signature)] = cleaned
 
     dest = output_path or input_path
-    with open(dest, "w", encoding="utf-8") as handle:
-        json.dump(updated, handle, ensure_ascii=False, indent=2)
+    storage.apply_changes(input_path, updates, [], record_signature, dest=dest)
+    if updates:
+        refresh_derived(path=dest)
 
-    print(f"Reviewed {edited} entries. Saved to {dest}.")
+    print(f"Reviewed {len(updates)} entries. Saved to {dest}.")
+    print(f"Deepseek usage: {usage.budget_status()}")
 
 
 def _parse_args() -> argparse.Namespace:
@@ -0,0 +1,125 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import records
+import storage
+
+
+PROFILES_DIR = Path("profiles")
+MANIFEST_NAME = "manifest.json"
+
+
+def shard_for(key: str) -> str:
+    """
+    Two hex chars from a 32-bit FNV-1a hash of the key.
+    Mirrored by shardFor() in profile.js, so keep both in sync.
+    """
+    h = 0x811C9DC5
+    for byte in (key or "").encode("utf-8"):
+        h ^= byte
+        h = (h * 0x01000193) & 0xFFFFFFFF
+    return f"{h & 0xFF:02x}"
+
+
+def shard_path(key: str) -> str:
+    """Relative (posix) path of the shard file for a person or incident id."""
+    return f"{shard_for(key)}/{key}.json"
+
+
+def _serialize(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=records.to_jsonable)
+
+
+def build_payloads(entries):
+    """
+    Yields (relative_path, payload) for every person id and every multi-victim incident.
+    Person payloads carry the other victims of the same incident as `related`.
+    """
+    by_incident = defaultdict(list)
+    for record in entries:
+        incident_id = record.get("incident_id")
+        if incident_id:
+            by_incident[incident_id].append(record)
+
+    for record in entries:
+        person_id = record.get("id")
+        if not person_id:
+            continue
+        incident_id = record.get("incident_id")
+        related = [
+            other for other in by_incident.get(incident_id, [])
+            if other.get("id") != person_id
+        ]
+        yield shard_path(person_id), {"record": record, "related": related}
+
+    for incident_id, members in by_incident.items():
+        if len(members) < 2:
+            continue
+        yield shard_path(incident_id), {"incident_id": incident_id, "records": members}
+
+
+def _load_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle).get("files", {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def write_shards(entries, out_dir=None):
+    """
+    Writes one small JSON file per id into out_dir/<shard>/<id>.json.
+    Only files whose content hash changed since the last run are rewritten;
+    files for ids that no longer exist are removed.
+    Returns (written, removed).
+    """
+    out_dir = Path(out_dir or PROFILES_DIR)
+    previous = _load_manifest(out_dir)
+    current = {}
+    written = 0
+
+    for rel_path, payload in build_payloads(entries):
+        body = _serialize(payload)
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        current[rel_path] = digest
+        dest = out_dir / rel_path
+        if previous.get(rel_path) == digest and dest.exists():
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with storage.atomic_open(dest) as handle:
+            handle.write(body)
+        written += 1
+
+    removed = 0
+    for rel_path in previous.keys() - current.keys():
+        stale = out_dir / rel_path
+        if stale.exists():
+            os.remove(stale)
+            removed += 1
+
+    if written or removed or previous.keys() != current.keys():
+        out_dir.mkdir(parents=True, exist_ok=True)
+        storage.atomic_write_json(out_dir / MANIFEST_NAME, {"files": current}, ensure_ascii=False, separators=(",", ":"))
+
+    return written, removed
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build per-person profile shards from data.json.")
+    parser.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    parser.add_argument("--output", default=str(PROFILES_DIR), help="Directory for shard files.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    data = records.load_records(args.input)
+    written, removed = write_shards(data, args.output)
+    print(f"Wrote {written} profile shards, removed {removed}. Output: {args.output}")
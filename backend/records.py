@@ -0,0 +1,233 @@
+import json
+import os
+import sys
+
+
+# Canonical key order of a person record, as written by main.process_tweets
+FIELDS = (
+    "id",
+    "person_name",
+    "age",
+    "age_min",
+    "age_max",
+    "gender",
+    "coords",
+    "date",
+    "location",
+    "city",
+    "district",
+    "company",
+    "cause",
+    "details",
+    "sector",
+    "sector_raw",
+    "tweetId",
+    "tweetUrl",
+    "addedAt",
+    "image",
+    "imageUrl",
+    "related_tweet_ids",
+    "victim_group_id",
+    "incident_id",
+    "multi_victim",
+)
+
+# Low-cardinality strings shared by many records; interning stores each value once
+INTERNED_FIELDS = frozenset({"gender", "city", "district", "sector", "sector_raw", "age", "date", "company"})
+
+_FIELD_SET = frozenset(FIELDS)
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+class Record:
+    """
+    Compact person record: one slot per known key instead of a ~28-entry dict.
+    Absent keys are stored as MISSING so to_dict() round-trips exactly; unknown keys
+    (e.g. `messages`) live in `extra`. Supports the dict methods the pipeline uses
+    (get, [], in, keys, items), so code written against plain dicts keeps working.
+    """
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self):
+        for field in FIELDS:
+            object.__setattr__(self, field, MISSING)
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Record":
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    def to_dict(self) -> dict:
+        result = {}
+        for field in FIELDS:
+            value = getattr(self, field)
+            if value is MISSING:
+                continue
+            if field == "coords" and isinstance(value, tuple):
+                value = list(value)
+            result[field] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is MISSING:
+                raise KeyError(key)
+            if key == "coords" and isinstance(value, tuple):
+                return list(value)
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if isinstance(value, str) and key in INTERNED_FIELDS:
+                value = sys.intern(value)
+            elif key == "coords" and isinstance(value, list):
+                value = tuple(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET and getattr(self, key) is not MISSING:
+            setattr(self, key, MISSING)
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+def to_jsonable(obj):
+    """json.dump `default=` hook for Record objects."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def iter_json_array(handle, chunk_size=1 << 16):
+    """
+    Incrementally decodes a top-level JSON array of objects, yielding one element at a
+    time. Only a chunk plus the element being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if not started and pos < len(buffer):
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            break
+
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        if pos < len(buffer):
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A scalar cut at the chunk boundary could decode as a shorter value
+                if end < len(buffer) or eof or isinstance(element, (dict, list)):
+                    yield element
+                    pos = end
+                    continue
+
+        if eof:
+            if not started:
+                return
+            raise ValueError("Unterminated JSON array")
+
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_records(path):
+    """Streams records from a JSON array file as Record objects."""
+    with open(path, "r", encoding="utf-8") as handle:
+        for item in iter_json_array(handle):
+            yield Record.from_dict(item) if isinstance(item, dict) else item
+
+
+def load_records(path):
+    """Loads a JSON array file into a list of Records; missing files load as an empty list."""
+    if not os.path.exists(path):
+        return []
+    return list(iter_records(path))
+
+
+def write_json_array(items, handle):
+    """
+    Streams items as a JSON array. Output is byte-identical to
+    json.dump(list(items), handle, ensure_ascii=False, indent=2).
+    """
+    first = True
+    for item in items:
+        body = json.dumps(item, ensure_ascii=False, indent=2, default=to_jsonable)
+        handle.write("[\n  " if first else ",\n  ")
+        handle.write(body.replace("\n", "\n  "))
+        first = False
+    handle.write("[]" if first else "\n]")
+
+
+def dump_records(records, path):
+    with open(path, "w", encoding="utf-8") as handle:
+        write_json_array(records, handle)
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import storage
+
+
+QUEUE_FILE = 'retry_queue.json'
+BACKOFF_BASE = int(os.getenv("RETRY_BACKOFF_BASE", "300"))  # seconds before the first retry
+BACKOFF_MAX = int(os.getenv("RETRY_BACKOFF_MAX", str(24 * 3600)))
+MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "8"))
+
+STAGES = ("analyze", "geocode", "media")
+
+
+def backoff(attempts: int) -> int:
+    """Seconds to wait after the given number of failed attempts (exponential, capped)."""
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def load():
+    """Returns the queued items keyed by "<stage>:<key>"."""
+    try:
+        with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save(items):
+    if items or os.path.exists(QUEUE_FILE):
+        storage.atomic_write_json(QUEUE_FILE, items, ensure_ascii=False, indent=2)
+
+
+def record_failure(stage, key, inputs, error, record_ids=None):
+    """
+    Adds a failed operation to the queue, or bumps the attempt count of a queued one.
+    `inputs` must be JSON-serializable and enough to re-run the stage on its own;
+    `record_ids` are the person records to patch once it succeeds.
+    """
+    now = time.time()
+    item_key = f"{stage}:{key}"
+    with storage.file_lock(QUEUE_FILE):
+        items = load()
+        item = items.get(item_key) or {
+            "stage": stage,
+            "key": str(key),
+            "attempts": 0,
+            "first_failed_at": datetime.now().isoformat(timespec="seconds"),
+            "record_ids": [],
+        }
+        item["inputs"] = inputs
+        item["error"] = f"{type(error).__name__}: {error}"
+        item["attempts"] += 1
+        item["last_failed_at"] = datetime.now().isoformat(timespec="seconds")
+        item["next_attempt"] = now + backoff(item["attempts"])
+        item["record_ids"] = sorted(set(item["record_ids"]) | set(record_ids or []))
+        items[item_key] = item
+        _save(items)
+    return item
+
+
+def resolve(stage, key):
+    """Drops an item once its retry succeeded."""
+    with storage.file_lock(QUEUE_FILE):
+        items = load()
+        if items.pop(f"{stage}:{key}", None) is not None:
+            _save(items)
+
+
+def due(items=None, now=None, force=False):
+    """Items whose backoff has elapsed and that have attempts left, oldest failure first."""
+    now = now or time.time()
+    items = load() if items is None else items
+    ready = [
+        item for item in items.values()
+        if item["attempts"] < MAX_ATTEMPTS and (force or item.get("next_attempt", 0) <= now)
+    ]
+    return sorted(ready, key=lambda item: item.get("first_failed_at", ""))
+
+
+def exhausted(items=None):
+    """Items that used up MAX_ATTEMPTS; due() skips them, so they need a manual look."""
+    items = load() if items is None else items
+    dead = [item for item in items.values() if item["attempts"] >= MAX_ATTEMPTS]
+    return sorted(dead, key=lambda item: item.get("first_failed_at", ""))
@@ -0,0 +1,354 @@
+import json
+import re
+
+
+# Field kinds; every field is nullable
+ANALYSIS_SCHEMA = {
+    "is_incident": "bool",
+    "date": "str",
+    "city": "str",
+    "district": "str",
+    "location": "str",
+    "company": "str",
+    "sector_raw": "str",
+    "cause": "str",
+    "details": "str",
+    "victims": "victims",
+}
+VICTIM_SCHEMA = {
+    "name": "str",
+    "age": "int",
+    "age_min": "int",
+    "age_max": "int",
+    "gender": "gender",
+}
+# postprocessor keeps victims as display strings, e.g. "Ali Veli (45)"
+EDIT_SCHEMA = {
+    "date": "str",
+    "location": "str",
+    "city": "str",
+    "district": "str",
+    "company": "str",
+    "victims": "names",
+    "age_min": "int",
+    "age_max": "int",
+    "gender": "gender",
+    "cause": "str",
+    "details": "str",
+    "sector": "str",
+    "tweetText": "str",
+}
+
+GENDERS = ("Erkek", "Kadın", "Bilinmiyor")
+KIND_HINTS = {
+    "str": "a string or null",
+    "int": "an integer or null",
+    "bool": "true or false",
+    "gender": '"Erkek", "Kadın" or "Bilinmiyor"',
+    "victims": 'an array of objects {"name": string|null, "age": int|null, "age_min": int|null, '
+               '"age_max": int|null, "gender": "Erkek"|"Kadın"|"Bilinmiyor"}',
+    "names": "an array of strings (name, with the age in parentheses if known)",
+    "victim": 'an object {"name": string|null, "age": int|null, "age_min": int|null, '
+              '"age_max": int|null, "gender": "Erkek"|"Kadın"|"Bilinmiyor"}',
+    "name": "a string (name, with the age in parentheses if known)",
+}
+# Kind of one element of a list kind
+ITEM_KINDS = {"victims": "victim", "names": "name"}
+
+REASK_PROMPT = """
+You fix fields of a JSON extraction from a Turkish tweet about a work homicide.
+Return ONLY a JSON object containing exactly the keys you are asked for (keys such as
+"victims[0].age" are paths; use them verbatim as keys), with the requested types.
+Use null when the tweet does not support a value. No markdown.
+"""
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_NUMBER_RE = re.compile(r"\d+")
+_NAME_AGE_RE = re.compile(r"^(.*?)[\s,(-]*(\d{1,3})\s*\)?\s*(?:yaş\w*)?\s*$", re.IGNORECASE)
+_NULL_STRINGS = {"", "null", "none", "-", "yok", "bilinmiyor", "unknown"}
+# "victims", "victims[2]" or "victims[2].age"
+_PATH_RE = re.compile(r"^(\w+)(?:\[(\d+)\](?:\.(\w+))?)?$")
+
+
+def parse_json(content):
+    """
+    Fast path: plain json.loads. Otherwise strips code fences, cuts the outermost {...}
+    out of surrounding prose and drops trailing commas. Returns None for a literal null
+    and raises ValueError when there is no JSON object to recover.
+    """
+    text = (content or "").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    text = _FENCE_RE.sub("", text).strip()
+    if text.lower() == "null":
+        return None
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError(f"No JSON object in model output: {text[:120]!r}")
+    candidate = text[start:end + 1]
+    for attempt in (candidate, _TRAILING_COMMA_RE.sub(r"\1", candidate)):
+        try:
+            return json.loads(attempt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unparseable JSON in model output: {text[:120]!r}")
+
+
+def _gender(value):
+    text = str(value).strip().lower()
+    if text.startswith(("k", "f", "w")):  # kadın / female / woman
+        return "Kadın"
+    if text.startswith(("e", "m")):  # erkek / male / man
+        return "Erkek"
+    return "Bilinmiyor"
+
+
+def _victim_from_string(text):
+    match = _NAME_AGE_RE.match(text)
+    if match and match.group(2):
+        return {"name": match.group(1).strip() or None, "age": int(match.group(2))}
+    return {"name": text.strip() or None}
+
+
+def _victim(value):
+    if isinstance(value, str):
+        value = _victim_from_string(value)
+    if not isinstance(value, dict):
+        return None, f"expected a victim object, got {value!r}"
+
+    victim = dict(value)
+    age = victim.get("age")
+    # "35-40" -> an age range
+    if isinstance(age, str) and len(_NUMBER_RE.findall(age)) == 2:
+        low, high = (int(n) for n in _NUMBER_RE.findall(age))
+        victim["age"] = None
+        if victim.get("age_min") is None:
+            victim["age_min"] = low
+        if victim.get("age_max") is None:
+            victim["age_max"] = high
+
+    # An invalid sub-field is nulled on its own; the victim is kept
+    problems = {}
+    for field, kind in VICTIM_SCHEMA.items():
+        if field in victim:
+            victim[field], problem = _coerce(kind, victim[field])
+            if problem:
+                problems[f".{field}"] = problem
+    return victim, problems or None
+
+
+def _list_of(value, convert):
+    """
+    Converts every element. Problems come back as {"[i]" or "[i].field": reason}; an
+    element that cannot be converted at all is left as None for the caller to drop.
+    """
+    if isinstance(value, (str, dict)):
+        value = [value]
+    if not isinstance(value, list):
+        return None, f"expected an array, got {type(value).__name__}"
+    items = []
+    problems = {}
+    for index, item in enumerate(value):
+        converted, problem = convert(item)
+        if isinstance(problem, dict):
+            problems.update((f"[{index}]{sub}", reason) for sub, reason in problem.items())
+        elif problem:
+            problems[f"[{index}]"] = problem
+        items.append(converted)
+    return items, problems or None
+
+
+def _name_string(value):
+    if isinstance(value, str):
+        return value.strip(), None
+    if isinstance(value, dict) and value.get("name"):
+        age = value.get("age")
+        return (f"{value['name']} ({age})" if age else str(value["name"])), None
+    return None, f"expected a name string, got {value!r}"
+
+
+def _coerce(kind, value):
+    """
+    (value, None) when the value is valid or could be repaired, (None, reason) otherwise.
+    List kinds keep their valid parts and return {sub-path: reason} for the rest.
+    """
+    if value is None:
+        return None, None
+
+    if kind == "str":
+        if isinstance(value, str):
+            value = value.strip()
+            return (None if value.lower() in _NULL_STRINGS else value), None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value), None
+        return None, f"expected a string, got {type(value).__name__}"
+
+    if kind == "int":
+        if isinstance(value, bool):
+            return None, "expected an integer, got a boolean"
+        if isinstance(value, int):
+            return value, None
+        if isinstance(value, float) and value.is_integer():
+            return int(value), None
+        if isinstance(value, str):
+            if value.strip().lower() in _NULL_STRINGS:
+                return None, None
+            numbers = _NUMBER_RE.findall(value)
+            if len(numbers) == 1:
+                return int(numbers[0]), None
+        return None, f"expected an integer, got {value!r}"
+
+    if kind == "bool":
+        if isinstance(value, bool):
+            return value, None
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true", None
+        return None, f"expected true or false, got {value!r}"
+
+    if kind == "gender":
+        return (value if value in GENDERS else _gender(value)), None
+
+    if kind == "victims":
+        return _list_of(value, _victim)
+
+    if kind == "names":
+        return _list_of(value, _name_string)
+
+    if kind == "victim":
+        return _victim(value)
+
+    if kind == "name":
+        return _name_string(value)
+
+    raise ValueError(f"Unknown field kind {kind!r}")
+
+
+def _parse_path(path):
+    field, index, sub = _PATH_RE.match(path).groups()
+    return field, None if index is None else int(index), sub
+
+
+def _path_kind(schema, path):
+    field, index, sub = _parse_path(path)
+    if index is None:
+        return schema[field]
+    return VICTIM_SCHEMA[sub] if sub else ITEM_KINDS[schema[field]]
+
+
+def _path_value(data, path):
+    """The raw model value at a path, or None when it is not there."""
+    field, index, sub = _parse_path(path)
+    value = data.get(field)
+    if index is None:
+        return value
+    items = [value] if isinstance(value, (str, dict)) else value
+    item = items[index] if isinstance(items, list) and index < len(items) else None
+    if sub is None:
+        return item
+    return item.get(sub) if isinstance(item, dict) else None
+
+
+def _set_path(cleaned, path, value):
+    field, index, sub = _parse_path(path)
+    if index is None:
+        cleaned[field] = value
+    elif sub is None:
+        cleaned[field][index] = value
+    elif cleaned[field][index] is not None:
+        cleaned[field][index][sub] = value
+
+
+def validate(data, schema, required=()):
+    """
+    Returns (cleaned, problems). Valid fields pass through after one type check each;
+    common defects (numbers as strings, "35-40" ages, victims as strings, free-form
+    genders, "null" strings) are repaired. Values that cannot be repaired are set to
+    None in `cleaned` and reported in `problems` as {path: reason}, where a path is a
+    field ("date"), a list element ("victims[1]") or a victim field ("victims[0].age"),
+    so one bad age does not discard the whole victim list.
+    Keys that are not in the schema are kept as they are.
+    """
+    if not isinstance(data, dict):
+        return {}, {"$": f"expected a JSON object, got {type(data).__name__}"}
+
+    cleaned = dict(data)
+    problems = {}
+    for field, kind in schema.items():
+        if field in data:
+            cleaned[field], problem = _coerce(kind, data[field])
+            if isinstance(problem, dict):
+                problems.update((field + sub, reason) for sub, reason in problem.items())
+            elif problem:
+                problems[field] = problem
+    for field in required:
+        if field not in data:
+            problems[field] = "missing"
+    return cleaned, problems
+
+
+def reask_messages(problems, data, schema, context):
+    """A short follow-up that asks only for the fields (or victim fields) that could not be repaired."""
+    lines = [context.strip(), "", "Your previous answer had invalid values for these fields:"]
+    for path, reason in problems.items():
+        lines.append(
+            f"- {path}: {reason} (was {json.dumps(_path_value(data, path), ensure_ascii=False)}); "
+            f"must be {KIND_HINTS[_path_kind(schema, path)]}"
+        )
+    lines.append(f"Return only a JSON object with the keys: {', '.join(problems)}.")
+    return [
+        {"role": "system", "content": REASK_PROMPT},
+        {"role": "user", "content": "\n".join(lines)},
+    ]
+
+
+def _drop_invalid_items(cleaned, schema):
+    """List elements that stayed unusable (None) are dropped; the rest of the list is kept."""
+    for field, kind in schema.items():
+        if kind in ITEM_KINDS and isinstance(cleaned.get(field), list):
+            cleaned[field] = [item for item in cleaned[field] if item is not None]
+
+
+def parse_and_validate(content, schema, required=(), reask=None, context=""):
+    """
+    Parses and validates model output against `schema`. When some values cannot be
+    repaired and `reask(messages) -> str` is given, it is called once with a follow-up
+    asking only for those paths, and the valid answers are merged in; anything still
+    invalid stays None (a victim keeps its other fields, an unusable list element is
+    dropped). Returns the cleaned dict, or None for a literal null answer.
+    Raises ValueError when the output holds no JSON object at all.
+    """
+    data = parse_json(content)
+    if data is None:
+        return None
+    if isinstance(data, dict) and "is_incident" in schema and "is_incident" not in data and data.get("victims"):
+        data["is_incident"] = True
+
+    cleaned, problems = validate(data, schema, required)
+    if "$" in problems:
+        raise ValueError(problems["$"])
+
+    if problems and reask:
+        print(f"Re-asking the model for {', '.join(problems)}.")
+        try:
+            patch = parse_json(reask(reask_messages(problems, data, schema, context)))
+            for path in list(problems):
+                if not isinstance(patch, dict) or path not in patch:
+                    continue
+                value, problem = _coerce(_path_kind(schema, path), patch[path])
+                # A re-asked victim object may still carry a bad sub-field; that one stays None
+                if problem and not isinstance(problem, dict):
+                    continue
+                if _parse_path(path)[0] in cleaned:
+                    _set_path(cleaned, path, value)
+                    problems.pop(path)
+        except Exception as e:
+            print(f"Re-ask failed: {e}")
+
+    _drop_invalid_items(cleaned, schema)
+    if problems:
+        print(f"Dropping invalid fields: {problems}")
+    return cleaned
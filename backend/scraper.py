@@ -1,8 +1,11 @@
+import json
 import os
 from twikit import Client
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+import storage
+
 # Load environment variables
 load_dotenv()
 
@@ -14,29 +17,121 @@ CT0 = os.getenv('TWITTER_CT0')
 SEARCH_SINCE = os.getenv('SEARCH_SINCE')  # Format: YYYY-MM-DD
 SEARCH_UNTIL = os.getenv('SEARCH_UNTIL')  # Format: YYYY-MM-DD
 
-async def get_client():
-    """Get authenticated Twikit client"""
-    client = Client(
-        'en-US', 
-        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    )
-    
-    if os.path.exists('cookies.json'):
-        client.load_cookies('cookies.json')
-        return client
+SESSION_STATE_FILE = 'scraper_state.json'
+COOKIES_FILE = 'cookies.json'
+
+
+class TwitterSession:
+    """
+    One authenticated twikit client (and its HTTP connection pool) per process.
+    Resolved user ids and pagination cursors are persisted to SESSION_STATE_FILE and
+    refreshed cookies to COOKIES_FILE, so later batches and later runs skip the user
+    lookup and can resume a timeline or search where the previous one stopped.
+    """
+
+    def __init__(self, state_file=SESSION_STATE_FILE, cookies_file=COOKIES_FILE):
+        self.state_file = state_file
+        self.cookies_file = cookies_file
+        self.client = None
+        self.users = {}
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault('user_ids', {})
+        state.setdefault('cursors', {})
+        return state
+
+    async def get_client(self):
+        if self.client:
+            return self.client
+
+        client = Client(
+            'en-US',
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+        if os.path.exists(self.cookies_file):
+            client.load_cookies(self.cookies_file)
+        elif AUTH_TOKEN and CT0:
+            print("Using provided auth_token and ct0 cookies...")
+            client.set_cookies({
+                'auth_token': AUTH_TOKEN,
+                'ct0': CT0
+            })
+        else:
+            raise ValueError("No authentication credentials found")
 
-    if AUTH_TOKEN and CT0:
-        print("Using provided auth_token and ct0 cookies...")
-        client.set_cookies({
-            'auth_token': AUTH_TOKEN,
-            'ct0': CT0
-        })
+        self.client = client
         return client
-    
-    raise ValueError("No authentication credentials found")
+
+    async def get_user(self, screen_name):
+        """The user object, looked up once per process."""
+        if screen_name not in self.users:
+            client = await self.get_client()
+            self.users[screen_name] = await client.get_user_by_screen_name(screen_name)
+            self.state['user_ids'][screen_name] = self.users[screen_name].id
+        return self.users[screen_name]
+
+    async def user_id(self, screen_name):
+        """The numeric user id; cached across runs, so most runs never resolve the handle."""
+        if screen_name not in self.state['user_ids']:
+            await self.get_user(screen_name)
+        return self.state['user_ids'][screen_name]
+
+    def cursor(self, key):
+        return self.state['cursors'].get(key)
+
+    def set_cursor(self, key, cursor):
+        if cursor:
+            self.state['cursors'][key] = cursor
+        else:
+            self.state['cursors'].pop(key, None)
+
+    def save(self):
+        """Persists the state file and the (possibly refreshed) cookies."""
+        storage.atomic_write_json(self.state_file, self.state, ensure_ascii=False, indent=2)
+        if self.client:
+            try:
+                self.client.save_cookies(self.cookies_file)
+            except Exception as e:
+                print(f"Could not save cookies: {e}")
+
+
+_session = None
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = TwitterSession()
+    return _session
 
 
-async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, until=None, limit=500, max_retries=3):
+async def get_client():
+    """Get the authenticated Twikit client of the process-wide session"""
+    return await get_session().get_client()
+
+
+def to_tweet_dict(tweet, target_username):
+    """Flatten a twikit Tweet, keeping reply linkage so threads can be regrouped later."""
+    legacy = getattr(tweet, '_legacy', None) or {}
+    in_reply_to = getattr(tweet, 'in_reply_to', None) or legacy.get('in_reply_to_status_id_str')
+    conversation_id = legacy.get('conversation_id_str') or getattr(tweet, 'conversation_id', None)
+    return {
+        'id': tweet.id,
+        'text': tweet.text,
+        'created_at': tweet.created_at,
+        'media': tweet.media if hasattr(tweet, 'media') else [],
+        'url': f"https://x.com/{target_username}/status/{tweet.id}",
+        'in_reply_to': str(in_reply_to) if in_reply_to else None,
+        'conversation_id': str(conversation_id) if conversation_id else None,
+    }
+
+
+async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, until=None, limit=500, max_retries=3, resume=False):
     """
     Fetch tweets using Twitter Search API with date ranges.
     This bypasses the 3200 timeline limit!
@@ -47,13 +142,15 @@ async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, unti
         until: End date (YYYY-MM-DD format)  
         limit: Maximum tweets to fetch
         max_retries: Number of retries on rate limit
+        resume: Continue from the cursor saved by the previous run of the same query
     
     Returns:
-        List of tweet dictionaries
+        List of tweet dictionaries (whole pages, so the saved cursor never skips tweets)
     """
     import asyncio as aio
     
-    client = await get_client()
+    session = get_session()
+    client = await session.get_client()
     
     # Build search query
     since_date = since or SEARCH_SINCE
@@ -68,16 +165,22 @@ async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, unti
     print(f"Search query: {query}")
     print(f"Fetching up to {limit} tweets...")
     
+    cursor_key = f"search:{query}"
+    cursor = session.cursor(cursor_key) if resume else None
+    if cursor:
+        print("Resuming from the saved search cursor...")
+    
     all_tweets = []
     
     # Retry logic for rate limits
     for attempt in range(max_retries):
         try:
             # Initial search
-            results = await client.search_tweet(query, product='Latest')
+            results = await client.search_tweet(query, product='Latest', cursor=cursor)
             
             if results:
                 all_tweets.extend(results)
+                session.set_cursor(cursor_key, getattr(results, 'next_cursor', None))
                 print(f"Fetched {len(all_tweets)}/{limit} tweets...")
                 
                 # Pagination
@@ -88,9 +191,11 @@ async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, unti
                         more = await results.next()
                         if not more:
                             print("No more tweets available.")
+                            session.set_cursor(cursor_key, None)
                             break
                         all_tweets.extend(more)
                         results = more
+                        session.set_cursor(cursor_key, getattr(results, 'next_cursor', None))
                         print(f"Fetched {len(all_tweets)}/{limit} tweets...")
                     except Exception as e:
                         if "404" in str(e) or "NotFound" in str(e):
@@ -118,23 +223,11 @@ async def fetch_tweets_by_search(target_username='isigmeclisi', since=None, unti
                 traceback.print_exc()
                 break
     
-    # Trim to limit
-    all_tweets = all_tweets[:limit]
+    session.save()
     print(f"Total tweets fetched: {len(all_tweets)}")
     
     # Convert to dict format
-    tweet_data = []
-    for tweet in all_tweets:
-        tweet_info = {
-            'id': tweet.id,
-            'text': tweet.text,
-            'created_at': tweet.created_at,
-            'media': tweet.media if hasattr(tweet, 'media') else [],
-            'url': f"https://x.com/{target_username}/status/{tweet.id}"
-        }
-        tweet_data.append(tweet_info)
-    
-    return tweet_data
+    return [to_tweet_dict(tweet, target_username) for tweet in all_tweets]
 
 
 async def fetch_tweets_by_month(target_username='isigmeclisi', year=2024, month=1, limit=500):
@@ -151,55 +244,86 @@ async def fetch_tweets_by_month(target_username='isigmeclisi', year=2024, month=
 
 
 # Legacy function for compatibility
-async def fetch_tweets(target_username='isigmeclisi', limit=20, start_before=None):
+async def fetch_tweets(target_username='isigmeclisi', limit=20, start_before=None, resume=False):
     """
     Legacy timeline-based fetch (limited to ~3200 recent tweets).
     Use fetch_tweets_by_search for historical tweets.
+    With resume, paging continues from the cursor where the previous call (in this run
+    or an earlier one) stopped instead of re-walking the timeline from the top.
+    Tweets with an id >= start_before are dropped.
     """
-    client = await get_client()
+    session = get_session()
+    client = await session.get_client()
     
     try:
-        user = await client.get_user_by_screen_name(target_username)
+        user_id = await session.user_id(target_username)
     except Exception as e:
         print(f"Error getting user: {e}")
         raise
 
-    print(f"Fetching tweets from {target_username} timeline...")
+    cursor_key = f"timeline:{target_username}"
+    cursor = session.cursor(cursor_key) if resume else None
+    print(f"Fetching tweets from {target_username} timeline{' (resuming)' if cursor else ''}...")
     
-    tweets = await user.get_tweets('Tweets', count=limit)
+    tweets = await client.get_user_tweets(user_id, 'Tweets', count=min(limit, 40), cursor=cursor)
     
     all_tweets = []
-    if tweets:
-        all_tweets.extend(tweets)
-        
-        while len(all_tweets) < limit:
-            print(f"Fetched {len(all_tweets)}/{limit} tweets...")
-            try:
-                more_tweets = await tweets.next()
-                if not more_tweets:
-                    print("No more tweets available.")
-                    break
-                all_tweets.extend(more_tweets)
-                tweets = more_tweets
-            except Exception as e:
-                print(f"Error: {e}")
-                break
+    while tweets:
+        all_tweets.extend(t for t in tweets if start_before is None or int(t.id) < int(start_before))
+        session.set_cursor(cursor_key, getattr(tweets, 'next_cursor', None))
+        if len(all_tweets) >= limit:
+            break
+        print(f"Fetched {len(all_tweets)}/{limit} tweets...")
+        try:
+            tweets = await tweets.next()
+        except Exception as e:
+            print(f"Error: {e}")
+            break
+        if not tweets:
+            print("No more tweets available.")
+            session.set_cursor(cursor_key, None)
     
-    all_tweets = all_tweets[:limit]
+    session.save()
     print(f"Total tweets fetched: {len(all_tweets)}")
 
-    tweet_data = []
-    for tweet in all_tweets:
-        tweet_info = {
-            'id': tweet.id,
-            'text': tweet.text,
-            'created_at': tweet.created_at,
-            'media': tweet.media if hasattr(tweet, 'media') else [],
-            'url': f"https://x.com/{target_username}/status/{tweet.id}"
-        }
-        tweet_data.append(tweet_info)
-            
-    return tweet_data
+    return [to_tweet_dict(tweet, target_username) for tweet in all_tweets]
+
+
+async def fetch_tweets_since(since_id, target_username='isigmeclisi', limit=200):
+    """
+    Incremental fetch: pages the timeline from the newest tweet until it reaches a tweet
+    with an id <= since_id, so an idle poll costs a single request and a backlog (e.g.
+    after downtime) is fetched without gaps. Returns (tweets oldest first, complete);
+    complete is False when the timeline ended before since_id was reached. Without a
+    since_id only the newest `limit` tweets are fetched.
+    """
+    session = get_session()
+    client = await session.get_client()
+    user_id = await session.user_id(target_username)
+    since_id = int(since_id or 0)
+
+    fresh = []
+    seen = 0
+    tweets = await client.get_user_tweets(user_id, 'Tweets', count=min(limit, 40))
+    while tweets:
+        for tweet in tweets:
+            if int(tweet.id) > since_id:
+                fresh.append(tweet)
+            else:
+                seen += 1
+        # A pinned tweet can be older than since_id, so one seen tweet is not enough to stop
+        if seen > 1 or (not since_id and len(fresh) >= limit):
+            break
+        tweets = await tweets.next()
+
+    complete = seen > 1 or not since_id
+    if not since_id:
+        fresh = fresh[:limit]
+    fresh.sort(key=lambda tweet: int(tweet.id))
+    if fresh:
+        print(f"Fetched {len(fresh)} new tweets since {since_id}.")
+        session.save()
+    return [to_tweet_dict(tweet, target_username) for tweet in fresh], complete
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+
+import records
+import storage
+from textnorm import fold
+
+
+SEARCH_DIR = Path("search")
+DOCS_NAME = "docs.json"
+MANIFEST_NAME = "manifest.json"
+# Text fields searched from the table view
+SEARCH_FIELDS = ("person_name", "company", "cause", "details", "location", "district", "city", "sector_raw")
+# Terms are sharded by their first PREFIX_LENGTH characters; shorter query terms fall back to a scan
+PREFIX_LENGTH = 2
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str):
+    """Folded terms of at least PREFIX_LENGTH characters. Mirrored by tokenize() in script.js."""
+    return [token for token in TOKEN_RE.findall(fold(text)) if len(token) >= PREFIX_LENGTH]
+
+
+def build_index(entries):
+    """
+    Returns (doc_ids, shards). doc_ids maps a document number to the record id;
+    shards maps a term prefix to {term: delta-encoded sorted document numbers}.
+    """
+    doc_ids = []
+    postings = defaultdict(set)
+    for record in entries:
+        doc = len(doc_ids)
+        doc_ids.append(record.get("id"))
+        for field in SEARCH_FIELDS:
+            for term in tokenize(record.get(field) or ""):
+                postings[term].add(doc)
+
+    shards = defaultdict(dict)
+    for term in sorted(postings):
+        previous = 0
+        deltas = []
+        for doc in sorted(postings[term]):
+            deltas.append(doc - previous)
+            previous = doc
+        shards[term[:PREFIX_LENGTH]][term] = deltas
+    return doc_ids, shards
+
+
+def _serialize(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _load_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle).get("files", {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def write_index(entries, out_dir=None):
+    """
+    Writes out_dir/docs.json and one out_dir/<prefix>.json per term prefix.
+    Like the profile shards, only files whose content changed are rewritten and
+    prefixes that no longer occur are removed. Returns (written, removed).
+    """
+    out_dir = Path(out_dir or SEARCH_DIR)
+    previous = _load_manifest(out_dir)
+    doc_ids, shards = build_index(entries)
+
+    files = {DOCS_NAME: doc_ids}
+    files.update((f"{prefix}.json", terms) for prefix, terms in shards.items())
+
+    current = {}
+    written = 0
+    for name, payload in files.items():
+        body = _serialize(payload)
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        current[name] = digest
+        dest = out_dir / name
+        if previous.get(name) == digest and dest.exists():
+            continue
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with storage.atomic_open(dest) as handle:
+            handle.write(body)
+        written += 1
+
+    removed = 0
+    for name in previous.keys() - current.keys():
+        stale = out_dir / name
+        if stale.exists():
+            os.remove(stale)
+            removed += 1
+
+    if written or removed or previous.keys() != current.keys():
+        payload = {"prefix_length": PREFIX_LENGTH, "fields": list(SEARCH_FIELDS), "files": current}
+        storage.atomic_write_json(out_dir / MANIFEST_NAME, payload, ensure_ascii=False, separators=(",", ":"))
+
+    return written, removed
+
+
+def search(query, doc_ids, shards):
+    """
+    Reference implementation of the browser lookup: every query term must match,
+    and a term matches any indexed term it is a prefix of. Returns matching record ids.
+    """
+    matched = None
+    for token in tokenize(query):
+        docs = set()
+        for term, deltas in shards.get(token[:PREFIX_LENGTH], {}).items():
+            if term.startswith(token):
+                doc = 0
+                for delta in deltas:
+                    doc += delta
+                    docs.add(doc)
+        matched = docs if matched is None else matched & docs
+        if not matched:
+            return []
+    return [doc_ids[doc] for doc in sorted(matched or [])]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the sharded full-text search index from data.json.")
+    parser.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    parser.add_argument("--output", default=str(SEARCH_DIR), help="Directory for index files.")
+    parser.add_argument("--query", default=None, help="Run a query against the built index and print the ids.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    data = records.load_records(args.input)
+    written, removed = write_index(data, args.output)
+    print(f"Wrote {written} search index files, removed {removed}. Output: {args.output}")
+
+    if args.query:
+        doc_ids, shards = build_index(data)
+        for person_id in search(args.query, doc_ids, shards):
+            print(person_id)
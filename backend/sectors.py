@@ -0,0 +1,139 @@
+import argparse
+import re
+
+from textnorm import turkish_lower
+
+
+DEFAULT_SECTOR = "Diğer İşkolları"
+
+SECTOR_CATEGORIES = [
+    "İnşaat, Yol",
+    "Taşımacılık",
+    "Diğer İşkolları",
+    "Tarım, Orman (İşçi)",
+    "Tarım, Orman (Çiftçi)",
+    "Ticaret, Büro",
+    "Madencilik",
+    "Belediye, Genel İşler",
+    "Kimya",
+    "Metal",
+    "Konaklama",
+]
+
+# Simple keyword mapping to the canonical list above.
+# Order is priority: when several sectors match, the earliest entry wins.
+SECTOR_KEYWORDS = [
+    ("İnşaat, Yol", ["inşaat", "şantiye", "yol", "tünel", "köprü"]),
+    ("Taşımacılık", ["kargo", "lojistik", "şoför", "nakliye", "otobüs", "kamyon", "taksi", "şöför", "havaalanı"]),
+    ("Tarım, Orman (İşçi)", ["tarım", "fındık", "pamuk", "mevsimlik", "sera", "orman işçisi"]),
+    ("Tarım, Orman (Çiftçi)", ["çiftçi", "biçerdöver", "traktör"]),
+    ("Ticaret, Büro", ["ofis", "büro", "mağaza", "market", "kasiyer", "satış"]),
+    ("Madencilik", ["maden", "ocak", "kömür", "lignit"]),
+    ("Belediye, Genel İşler", ["belediye", "temizlik işçisi", "itfaiye", "zabıta"]),
+    ("Kimya", ["kimya", "petrokimya", "gübre", "asits", "solvent", "boya"]),
+    ("Metal", ["metal", "döküm", "kaynak", "çelik", "fabrika", "sanayi", "endüstriyel"]),
+    ("Konaklama", ["otel", "pansiyon", "restoran", "lokanta", "aşçı", "garson"]),
+]
+
+
+class SectorMatcher:
+    """
+    Single compiled regex over every keyword.
+    The pattern is a zero-width lookahead, so finditer reports the highest-priority
+    keyword starting at each position; the lowest priority index overall wins.
+    """
+
+    def __init__(self, sector_keywords):
+        self.targets = [target for target, _ in sector_keywords]
+        self.priority = {}
+        ordered = []
+        for idx, (_, keywords) in enumerate(sector_keywords):
+            for kw in keywords:
+                kw = turkish_lower(kw)
+                if kw and kw not in self.priority:
+                    self.priority[kw] = idx
+                    ordered.append(kw)
+        ordered.sort(key=lambda kw: (self.priority[kw], -len(kw)))
+        self.pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+        self._cache = {}
+
+    def best_keyword(self, text: str):
+        """The highest-priority keyword found in text, or None."""
+        best = None
+        for found in self.pattern.finditer(turkish_lower(text)):
+            kw = found.group(1)
+            if best is None or self.priority[kw] < self.priority[best]:
+                best = kw
+                if self.priority[best] == 0:
+                    break
+        return best
+
+    def match(self, raw_sector: str) -> str:
+        if not raw_sector:
+            return DEFAULT_SECTOR
+        cached = self._cache.get(raw_sector)
+        if cached is not None:
+            return cached
+
+        kw = self.best_keyword(raw_sector)
+        result = self.targets[self.priority[kw]] if kw is not None else DEFAULT_SECTOR
+        self._cache[raw_sector] = result
+        return result
+
+
+_matcher = SectorMatcher(SECTOR_KEYWORDS)
+
+
+def normalize_sector(raw_sector: str) -> str:
+    return _matcher.match(raw_sector)
+
+
+def find_sector_keyword(text: str):
+    """First (highest-priority) sector keyword appearing in free text, or None."""
+    return _matcher.best_keyword(text) if text else None
+
+
+def renormalize_records(records):
+    """
+    Re-derives `sector` from `sector_raw` in one pass.
+    Records without sector_raw are left alone. Returns the number of records changed.
+    """
+    changed = 0
+    for record in records:
+        raw = record.get("sector_raw")
+        if not raw:
+            continue
+        sector = normalize_sector(raw)
+        if record.get("sector") != sector:
+            record["sector"] = sector
+            changed += 1
+    return changed
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-normalize the sector field of every record in data.json.")
+    parser.add_argument("--input", default="data.json", help="Path to source JSON file.")
+    parser.add_argument("--output", default=None, help="Path to write updated JSON (defaults to input).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many records would change.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import records
+    import storage
+    from main import record_signature, refresh_derived
+
+    args = _parse_args()
+    updates = {}
+    for record in records.iter_records(args.input):
+        key = storage.update_key(record, record_signature)
+        if renormalize_records([record]):
+            updates[key] = record
+
+    dest = args.output or args.input
+    if updates and not args.dry_run:
+        storage.apply_changes(args.input, updates, [], record_signature, dest=dest)
+        refresh_derived(path=dest)
+        print(f"Re-normalized sector for {len(updates)} records. Saved to {dest}.")
+    else:
+        print(f"{len(updates)} records would change." if args.dry_run else "No sector changes.")
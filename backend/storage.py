@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import records
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+LOCK_TIMEOUT = float(os.getenv("DATA_LOCK_TIMEOUT", "600"))
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """
+    Exclusive inter-process lock on `<path>.lock`. Every writer of data.json takes it
+    around its read-merge-write so concurrent workers never overwrite each other.
+    """
+    lock_path = f"{path}.lock"
+    deadline = time.monotonic() + timeout
+    with open(lock_path, "a+") as handle:
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not lock {path} within {timeout}s")
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def atomic_open(path, mode="w"):
+    """Write to a temp file in the same directory and rename it over `path` on success."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as handle:
+            yield handle
+            handle.flush()
+            os.fsync(handle.fileno())
+        # mkstemp creates 0600 files; keep the original (or a world-readable) mode for the static site
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, payload, **dump_kwargs):
+    with atomic_open(path) as handle:
+        json.dump(payload, handle, **dump_kwargs)
+
+
+def fingerprint(record) -> str:
+    data = record.to_dict() if isinstance(record, records.Record) else record
+    return hashlib.sha1(
+        json.dumps(data, ensure_ascii=False, sort_keys=True, default=records.to_jsonable).encode("utf-8")
+    ).hexdigest()
+
+
+def update_key(record, key_fn):
+    """
+    Identifies the on-disk record an update replaces: the dedup key plus the record id.
+    The dedup key alone (name|date|city) is not unique, so two people sharing it would
+    both be overwritten by one edit.
+    """
+    return key_fn(record), record.get("id")
+
+
+def snapshot(data, key_fn):
+    """
+    Remembers each loaded record's update key and content hash (by object identity), so
+    a later commit can tell which records this process added or changed. The record
+    itself is kept in the tuple so its id() cannot be reused by a new object.
+    """
+    return {id(record): (update_key(record, key_fn), fingerprint(record), record) for record in data}
+
+
+def diff(data, base):
+    """Returns (updates keyed by the record's update key at load time, additions)."""
+    updates = {}
+    additions = []
+    for record in data:
+        original = base.get(id(record))
+        if original is None:
+            additions.append(record)
+        elif original[1] != fingerprint(record):
+            if original[0] in updates:
+                raise ValueError(f"Two changed records share the key {original[0]}; refusing to merge them.")
+            updates[original[0]] = record
+    return updates, additions
+
+
+def _union_related(target, other):
+    related = set(target.get("related_tweet_ids") or []) | set(other.get("related_tweet_ids") or [])
+    if related:
+        target["related_tweet_ids"] = sorted(related)
+
+
+def _as_record(entry):
+    return entry if isinstance(entry, records.Record) else records.Record.from_dict(entry)
+
+
+def apply_changes(path, updates, additions, key_fn, dest=None):
+    """
+    Merge-on-commit. Under the lock, streams the current file and:
+      - replaces records whose update_key is in `updates` (our fields win, related_tweet_ids
+        are unioned); an update key that matches more than one record on disk raises
+        ValueError and leaves the file untouched;
+      - folds each addition into an existing record with the same key, or with the same
+        person_name and an overlapping related_tweet_ids (another worker saw the same tweet);
+      - appends the remaining additions.
+    The result is written atomically to `dest` (defaults to `path`). Returns the number of
+    additions that were appended as new records.
+    """
+    dest = dest or path
+    additions = [_as_record(entry) for entry in additions]
+    pending = {key_fn(entry): entry for entry in additions}
+    by_tweet = {}
+    for key, entry in pending.items():
+        for tweet_id in entry.get("related_tweet_ids") or []:
+            by_tweet.setdefault(tweet_id, []).append(key)
+
+    applied = set()
+
+    def _merged(existing):
+        for record in existing:
+            key = key_fn(record)
+            record_key = update_key(record, key_fn)
+            if record_key in updates:
+                if record_key in applied:
+                    raise ValueError(f"Update key {record_key} matches more than one record in {path}.")
+                applied.add(record_key)
+                updated = _as_record(updates[record_key])
+                _union_related(updated, record)
+                record = updated
+
+            matches = [key] if key in pending else list(dict.fromkeys(
+                other for tweet_id in record.get("related_tweet_ids") or []
+                for other in by_tweet.get(tweet_id, [])
+                if other in pending and pending[other].get("person_name") == record.get("person_name")
+            ))
+            for match in matches:
+                _union_related(record, pending.pop(match))
+            yield record
+        yield from pending.values()
+
+    with file_lock(dest):
+        with atomic_open(dest) as handle:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as source:
+                    records.write_json_array(_merged(records.iter_json_array(source)), handle)
+            else:
+                records.write_json_array(_merged([]), handle)
+    return len(pending)
+
+
+def commit(path, data, base, key_fn):
+    """Writes only this process's changes relative to `base` (see snapshot) into `path`."""
+    updates, additions = diff(data, base)
+    if not updates and not additions:
+        return 0, 0
+    appended = apply_changes(path, updates, additions, key_fn)
+    return len(updates), appended
@@ -0,0 +1,130 @@
+import argparse
+import random
+from datetime import date, timedelta
+
+import records
+from main import build_person_id, build_signature
+
+
+class Distributions:
+    """Empirical distributions of the fields in an existing dataset."""
+
+    def __init__(self, source):
+        self.first_names = []
+        self.last_names = []
+        self.ages = []
+        self.genders = []
+        self.sectors = []  # (sector, sector_raw)
+        self.places = []  # (city, district, location, coords)
+        self.companies = []
+        self.texts = []  # (cause, details)
+        self.images = []
+        self.multi_victim_share = 0.0
+        self.years = []
+
+        multi = 0
+        for record in source:
+            parts = (record.get("person_name") or "").split()
+            if len(parts) >= 2:
+                self.first_names.append(" ".join(parts[:-1]))
+                self.last_names.append(parts[-1])
+            self.ages.append((record.get("age"), record.get("age_min"), record.get("age_max")))
+            self.genders.append(record.get("gender"))
+            self.sectors.append((record.get("sector"), record.get("sector_raw")))
+            self.places.append((record.get("city"), record.get("district"), record.get("location"), record.get("coords")))
+            self.companies.append(record.get("company"))
+            self.texts.append((record.get("cause"), record.get("details")))
+            self.images.append(record.get("image") is not None)
+            multi += bool(record.get("multi_victim"))
+            year = (record.get("date") or "").split(".")[-1]
+            if year.isdigit():
+                self.years.append(int(year))
+        self.multi_victim_share = multi / max(len(source), 1)
+        self.years = self.years or [2025]
+
+
+def generate(count, source, seed=0):
+    """
+    Synthesizes `count` records whose field values follow the distributions in `source`.
+    Names are recombined first/last names; coords are jittered around real locations.
+    Signatures are unique, like in a deduplicated dataset.
+    """
+    rng = random.Random(seed)
+    dist = Distributions(source)
+    # Incidents hold 3 victims on average, so start fewer of them to match the per-record share
+    share = dist.multi_victim_share
+    multi_incident_chance = share / (3 - 2 * share) if share < 1 else 1.0
+    seen = set()
+    generated = []
+    tweet_base = 1_700_000_000_000_000_000
+    incident = None
+    incident_size = incident_left = 0
+
+    while len(generated) < count:
+        name = f"{rng.choice(dist.first_names)} {rng.choice(dist.last_names)}"
+        city, district, location, coords = rng.choice(dist.places)
+        day = date(rng.choice(dist.years), 1, 1) + timedelta(days=rng.randrange(365))
+        date_str = day.strftime("%d.%m.%Y")
+        signature = build_signature(name, date_str, city)
+        if signature in seen:
+            continue
+        seen.add(signature)
+
+        tweet_id = str(tweet_base + rng.randrange(10 ** 17))
+        if incident_left == 0:
+            incident = f"incident-{tweet_id}"
+            incident_size = incident_left = rng.randint(2, 4) if rng.random() < multi_incident_chance else 1
+        incident_left -= 1
+
+        age, age_min, age_max = rng.choice(dist.ages)
+        sector, sector_raw = rng.choice(dist.sectors)
+        cause, details = rng.choice(dist.texts)
+        if isinstance(coords, (list, tuple)) and len(coords) == 2:
+            coords = [round(coords[0] + rng.uniform(-0.05, 0.05), 7), round(coords[1] + rng.uniform(-0.05, 0.05), 7)]
+        has_image = rng.choice(dist.images)
+
+        generated.append({
+            "id": build_person_id(name, date_str, city),
+            "person_name": name,
+            "age": age,
+            "age_min": age_min,
+            "age_max": age_max,
+            "gender": rng.choice(dist.genders),
+            "coords": coords,
+            "date": date_str,
+            "location": location,
+            "city": city,
+            "district": district,
+            "company": rng.choice(dist.companies),
+            "cause": cause,
+            "details": details,
+            "sector": sector,
+            "sector_raw": sector_raw,
+            "tweetId": tweet_id,
+            "tweetUrl": f"https://x.com/isigmeclisi/status/{tweet_id}",
+            "addedAt": f"{day.isoformat()}T12:00:00",
+            "image": f"images/{tweet_id}-1.jpg" if has_image else None,
+            "imageUrl": f"https://pbs.twimg.com/media/{tweet_id}.jpg" if has_image else None,
+            "related_tweet_ids": [tweet_id],
+            "victim_group_id": incident,
+            "incident_id": incident,
+            "multi_victim": incident_size > 1,
+        })
+    return generated
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset shaped like data.json.")
+    parser.add_argument("--input", default="data.json", help="Dataset to learn distributions from.")
+    parser.add_argument("--output", required=True, help="Where to write the synthetic JSON array.")
+    parser.add_argument("--scale", type=float, default=10, help="Multiple of the input size to generate.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    source = records.load_records(args.input)
+    synthetic = generate(int(len(source) * args.scale), source, args.seed)
+    records.dump_records(synthetic, args.output)
+    print(f"Wrote {len(synthetic)} synthetic records to {args.output}.")
@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from profile_shards import shard_for
+from textnorm import fold
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SAMPLES = ["person-ali-kaya-izmir-01012024", "incident-1983146165131685899", "İŞÇİ ıskele Çağrı", "Şanlıurfa'da Ömer", ""]
+
+node = shutil.which("node")
+pytestmark = pytest.mark.skipif(node is None, reason="node is not installed")
+
+
+def _js_function(filename, name):
+    """Source of a top-level `function name(...) {...}` from one of the site scripts."""
+    with open(os.path.join(ROOT, filename), "r", encoding="utf-8") as handle:
+        source = handle.read()
+    start = source.index(f"function {name}(")
+    end = source.index("\n}\n", start) + 2
+    return source[start:end]
+
+
+def _run_js(filename, name, values):
+    script = f"{_js_function(filename, name)}\nconsole.log(JSON.stringify({json.dumps(values)}.map({name})));"
+    output = subprocess.run([node, "-e", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("filename", ["profile.js", "script.js"])
+def test_shard_for_matches_js(filename):
+    assert _run_js(filename, "shardFor", SAMPLES) == [shard_for(value) for value in SAMPLES]
+
+
+def test_fold_matches_js():
+    assert _run_js("script.js", "foldText", SAMPLES) == [fold(value) for value in SAMPLES]
@@ -0,0 +1,36 @@
+import io
+import json
+
+import pytest
+
+import records
+
+
+ITEMS = [{"id": "a", "text": "İşçi \"ölümü\", [virgül]"}, {"id": "b", "victims": [{"age": 34}]}, 7, "son"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 16])
+def test_iter_json_array_across_chunk_sizes(chunk_size):
+    text = json.dumps(ITEMS, ensure_ascii=False, indent=2)
+    assert list(records.iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == ITEMS
+
+
+def test_iter_json_array_number_cut_at_chunk_boundary():
+    assert list(records.iter_json_array(io.StringIO("[12345, 6]"), chunk_size=3)) == [12345, 6]
+
+
+@pytest.mark.parametrize("text", ["", "[]", "  [ ]  "])
+def test_iter_json_array_empty(text):
+    assert list(records.iter_json_array(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize("text", ['{"id": "a"}', '[{"id": "a"}'])
+def test_iter_json_array_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        list(records.iter_json_array(io.StringIO(text), chunk_size=4))
+
+
+def test_write_json_array_matches_json_dump():
+    handle = io.StringIO()
+    records.write_json_array(ITEMS, handle)
+    assert handle.getvalue() == json.dumps(ITEMS, ensure_ascii=False, indent=2)
@@ -0,0 +1,39 @@
+import pytest
+
+import schema
+
+
+def test_repairs_fenced_output_and_string_victims():
+    content = '```json\n{"is_incident": "true", "victims": ["Ali Kaya (34)"], "city": "null",}\n```'
+    result = schema.parse_and_validate(content, schema.ANALYSIS_SCHEMA, required=("is_incident",))
+    assert result["is_incident"] is True
+    assert result["city"] is None
+    assert result["victims"][0]["name"] == "Ali Kaya"
+    assert result["victims"][0]["age"] == 34
+
+
+def test_reasks_only_the_invalid_victim_field():
+    asked = []
+
+    def reask(messages):
+        asked.append(messages[-1]["content"])
+        return '{"victims[0].age": 41}'
+
+    content = '{"is_incident": true, "victims": [{"name": "Ali Kaya", "age": "otuz"}, {"name": "Veli Can"}]}'
+    result = schema.parse_and_validate(content, schema.ANALYSIS_SCHEMA, reask=reask)
+    assert "victims[0].age" in asked[0]
+    assert [v["name"] for v in result["victims"]] == ["Ali Kaya", "Veli Can"]
+    assert result["victims"][0]["age"] == 41
+
+
+def test_unrepaired_field_stays_none_without_reask():
+    content = '{"is_incident": true, "victims": [{"name": "Ali Kaya", "age": "otuz"}]}'
+    result = schema.parse_and_validate(content, schema.ANALYSIS_SCHEMA)
+    assert result["victims"][0]["name"] == "Ali Kaya"
+    assert result["victims"][0]["age"] is None
+
+
+def test_literal_null_and_missing_object():
+    assert schema.parse_and_validate("null", schema.ANALYSIS_SCHEMA) is None
+    with pytest.raises(ValueError):
+        schema.parse_and_validate("no json here", schema.ANALYSIS_SCHEMA)
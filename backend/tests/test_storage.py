@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import records
+import storage
+from main import record_signature
+
+
+def _person(record_id, name="Ali Kaya", **fields):
+    return {"id": record_id, "person_name": name, "date": "01.01.2024", "city": "İzmir", **fields}
+
+
+def _write(path, items):
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(items, handle, ensure_ascii=False)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def test_commit_keeps_other_writers_additions(tmp_path):
+    path = str(tmp_path / "data.json")
+    _write(path, [_person("a", sector="x")])
+
+    mine = records.load_records(path)
+    mine_base = storage.snapshot(mine, record_signature)
+    theirs = records.load_records(path)
+    theirs_base = storage.snapshot(theirs, record_signature)
+
+    theirs.append(records.Record.from_dict(_person("b", name="Veli Can")))
+    assert storage.commit(path, theirs, theirs_base, record_signature) == (0, 1)
+
+    mine[0]["sector"] = "y"
+    assert storage.commit(path, mine, mine_base, record_signature) == (1, 0)
+
+    assert [(r["id"], r.get("sector")) for r in _read(path)] == [("a", "y"), ("b", None)]
+
+
+def test_addition_folds_into_record_with_shared_tweet(tmp_path):
+    path = str(tmp_path / "data.json")
+    _write(path, [_person("a", related_tweet_ids=["1"])])
+
+    addition = _person("a2", date="02.01.2024", related_tweet_ids=["1", "2"])
+    assert storage.apply_changes(path, {}, [addition], record_signature) == 0
+
+    merged = _read(path)
+    assert len(merged) == 1
+    assert merged[0]["related_tweet_ids"] == ["1", "2"]
+
+
+def test_update_of_one_duplicate_signature_keeps_the_other(tmp_path):
+    path = str(tmp_path / "data.json")
+    _write(path, [_person("p1", sector="x"), _person("p2", sector="y")])
+
+    data = records.load_records(path)
+    base = storage.snapshot(data, record_signature)
+    data[1]["sector"] = "z"
+    storage.commit(path, data, base, record_signature)
+
+    assert [(r["id"], r["sector"]) for r in _read(path)] == [("p1", "x"), ("p2", "z")]
+
+
+def test_update_matching_two_records_is_refused(tmp_path):
+    path = str(tmp_path / "data.json")
+    twins = [_person("p1", sector="x"), _person("p1", sector="x")]
+    _write(path, twins)
+
+    updates = {storage.update_key(twins[0], record_signature): _person("p1", sector="z")}
+    with pytest.raises(ValueError):
+        storage.apply_changes(path, updates, [], record_signature)
+    assert _read(path) == twins
@@ -0,0 +1,20 @@
+import unicodedata
+
+
+def turkish_lower(text: str) -> str:
+    """
+    Lowercase with Turkish rules: I -> ı and İ -> i.
+    str.lower() maps İ to "i̇" (with a combining dot), which breaks keyword matching.
+    """
+    if not text:
+        return ""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def fold(text: str) -> str:
+    """
+    Search key: Turkish lowercase with the diacritics removed (ç->c, ğ->g, ı->i, ö->o, ş->s, ü->u),
+    so "İSKELE", "iskele" and "ıskele" all compare equal. Mirrored by foldText() in script.js.
+    """
+    decomposed = unicodedata.normalize("NFKD", turkish_lower(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).replace("ı", "i")
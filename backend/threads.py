@@ -0,0 +1,61 @@
+from extractor import reports_incident
+
+
+def _thread_root(tweet_id, by_id, standalone):
+    """
+    Walks in_reply_to links up to the oldest tweet present in the batch. A tweet in
+    `standalone` (it reports its own incident) is a root even when it is a reply, so
+    separate deaths posted in one conversation stay separate units.
+    """
+    seen = set()
+    current = tweet_id
+    while current not in seen and current not in standalone:
+        seen.add(current)
+        parent = by_id[current].get('in_reply_to')
+        if parent not in by_id:
+            break
+        current = parent
+    return current
+
+
+def group_threads(tweets):
+    """
+    Merges reply chains into single analysis units.
+    isigmeclisi posts an incident as a detail tweet followed by name/photo-only replies;
+    each chain becomes one unit whose text is the concatenated chain (oldest first),
+    whose media is the media of every tweet in it, and whose thread_ids lists every tweet.
+    Only sparse replies fold into their parent: a reply with its own death phrase and
+    province starts a unit of its own. Tweets whose parent is not in the batch stay on
+    their own, and units that are already grouped (e.g. re-queued from the retry queue)
+    pass through unchanged. Unit order follows the input.
+    """
+    by_id = {str(tweet['id']): tweet for tweet in tweets}
+    standalone = {tweet_id for tweet_id, tweet in by_id.items() if reports_incident(tweet.get('text'))}
+    groups = {}
+    for tweet in tweets:
+        root = _thread_root(str(tweet['id']), by_id, standalone)
+        groups.setdefault(root, []).append(tweet)
+
+    units = []
+    for root, members in groups.items():
+        members.sort(key=lambda t: int(t['id']))
+        if len(members) == 1:
+            tweet = dict(members[0])
+            tweet['thread_ids'] = tweet.get('thread_ids') or [str(tweet['id'])]
+            tweet['media_by_tweet'] = tweet.get('media_by_tweet') or [(str(tweet['id']), tweet.get('media') or [])]
+            units.append(tweet)
+            continue
+
+        head = by_id[root]
+        units.append({
+            'id': head['id'],
+            'text': "\n\n".join(t.get('text') or "" for t in members),
+            'created_at': head.get('created_at'),
+            'media': [item for t in members for item in (t.get('media') or [])],
+            'url': head.get('url'),
+            'in_reply_to': head.get('in_reply_to'),
+            'conversation_id': head.get('conversation_id'),
+            'thread_ids': [str(t['id']) for t in members],
+            'media_by_tweet': [(str(t['id']), t.get('media') or []) for t in members],
+        })
+    return units
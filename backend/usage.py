@@ -0,0 +1,204 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+
+USAGE_LOG = 'usage_log.jsonl'
+
+# USD per million tokens (deepseek-chat list prices); override when they change
+PRICE_INPUT = float(os.getenv("DEEPSEEK_PRICE_INPUT_PER_M", "0.27"))
+PRICE_CACHED_INPUT = float(os.getenv("DEEPSEEK_PRICE_CACHED_INPUT_PER_M", "0.07"))
+PRICE_OUTPUT = float(os.getenv("DEEPSEEK_PRICE_OUTPUT_PER_M", "1.10"))
+
+# Ceilings per budget window (0 = unlimited). BUDGET_ACTION is "downgrade" (local extractor only) or "stop".
+TOKEN_BUDGET = int(os.getenv("TOKEN_BUDGET", "0"))
+COST_BUDGET_USD = float(os.getenv("COST_BUDGET_USD", "0"))
+BUDGET_ACTION = os.getenv("BUDGET_ACTION", "downgrade").lower()
+# "run": every run, and every daemon cycle, gets the full budget (see start_run).
+# "day": one budget per calendar day, shared by all runs; earlier usage is read from USAGE_LOG.
+BUDGET_WINDOW = os.getenv("BUDGET_WINDOW", "run").lower()
+
+
+def _new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+RUN_ID = _new_run_id()
+run_totals = {"calls": 0, "tokens": 0, "cost": 0.0}
+_window_day = None
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+def start_run():
+    """
+    Starts a new run id and, with BUDGET_WINDOW=run, a fresh budget. The daemon calls
+    this at the start of every cycle, so one exhausted budget does not last until restart.
+    """
+    global RUN_ID
+    RUN_ID = _new_run_id()
+    if BUDGET_WINDOW == "run":
+        run_totals.update(calls=0, tokens=0, cost=0.0)
+
+
+def _roll_window():
+    """With BUDGET_WINDOW=day, resets the totals to today's logged usage when the day changes."""
+    global _window_day
+    today = datetime.now().date().isoformat()
+    if BUDGET_WINDOW != "day" or _window_day == today:
+        return
+    _window_day = today
+    todays = [entry for entry in load_log() if (entry.get("at") or "").startswith(today)]
+    run_totals.update(
+        calls=len(todays),
+        tokens=sum(entry.get("prompt_tokens", 0) + entry.get("completion_tokens", 0) for entry in todays),
+        cost=sum(entry.get("cost_usd", 0) for entry in todays),
+    )
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Short hash of a system prompt, so usage can be compared across prompt edits."""
+    return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:8]
+
+
+def _usage_value(usage, name):
+    value = getattr(usage, name, None)
+    if value is None and isinstance(usage, dict):
+        value = usage.get(name)
+    return int(value or 0)
+
+
+def cost_of(prompt_tokens, completion_tokens, cached_tokens=0) -> float:
+    fresh = max(prompt_tokens - cached_tokens, 0)
+    return (fresh * PRICE_INPUT + cached_tokens * PRICE_CACHED_INPUT + completion_tokens * PRICE_OUTPUT) / 1_000_000
+
+
+def record(stage, response, system_prompt, user_content, ref=None):
+    """
+    Appends the usage of one chat completion to USAGE_LOG and adds it to the window totals.
+    The API reports prompt tokens as one number, so the system / user split is estimated
+    from their character shares.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+
+    prompt_tokens = _usage_value(usage, "prompt_tokens")
+    completion_tokens = _usage_value(usage, "completion_tokens")
+    cached_tokens = _usage_value(usage, "prompt_cache_hit_tokens")
+    system_chars = len(system_prompt or "")
+    user_chars = len(user_content or "")
+    system_share = system_chars / max(system_chars + user_chars, 1)
+
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "run": RUN_ID,
+        "stage": stage,
+        "prompt_version": prompt_version(system_prompt or ""),
+        "ref": ref,
+        "model": getattr(response, "model", None),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "system_tokens_est": round(prompt_tokens * system_share),
+        "user_tokens_est": prompt_tokens - round(prompt_tokens * system_share),
+        "system_chars": system_chars,
+        "user_chars": user_chars,
+        "cost_usd": round(cost_of(prompt_tokens, completion_tokens, cached_tokens), 6),
+    }
+    _roll_window()
+    with open(USAGE_LOG, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    run_totals["calls"] += 1
+    run_totals["tokens"] += prompt_tokens + completion_tokens
+    run_totals["cost"] += entry["cost_usd"]
+    return entry
+
+
+def budget_exceeded() -> bool:
+    _roll_window()
+    return bool(
+        (TOKEN_BUDGET and run_totals["tokens"] >= TOKEN_BUDGET)
+        or (COST_BUDGET_USD and run_totals["cost"] >= COST_BUDGET_USD)
+    )
+
+
+def budget_status() -> str:
+    tokens = f"{TOKEN_BUDGET} tokens" if TOKEN_BUDGET else "no token limit"
+    cost = f"${COST_BUDGET_USD:g}" if COST_BUDGET_USD else "no cost limit"
+    _roll_window()
+    window = "today" if BUDGET_WINDOW == "day" else "per run"
+    return (
+        f"{run_totals['calls']} calls, {run_totals['tokens']} tokens, ${run_totals['cost']:.4f} "
+        f"(budget {window}: {tokens}, {cost})"
+    )
+
+
+def load_log(path=USAGE_LOG):
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def summarize(entries, group_fields):
+    """Totals per group, biggest cost first."""
+    groups = defaultdict(lambda: defaultdict(float))
+    for entry in entries:
+        key = tuple(entry.get(field) for field in group_fields)
+        totals = groups[key]
+        totals["calls"] += 1
+        for field in ("prompt_tokens", "completion_tokens", "cached_tokens",
+                      "system_tokens_est", "user_tokens_est", "cost_usd"):
+            totals[field] += entry.get(field) or 0
+    return sorted(groups.items(), key=lambda item: item[1]["cost_usd"], reverse=True)
+
+
+def report(entries, run=None, top=10):
+    if run:
+        entries = [entry for entry in entries if entry.get("run") == run]
+    if not entries:
+        print("No usage recorded.")
+        return
+
+    for fields in (("run",), ("stage", "prompt_version")):
+        print(f"\nBy {' / '.join(fields)}:")
+        for key, totals in summarize(entries, fields):
+            calls = int(totals["calls"])
+            prompt = totals["prompt_tokens"] or 1
+            print(
+                f"  {' / '.join(str(k) for k in key):<32} {calls:>6} calls  "
+                f"prompt {int(totals['prompt_tokens']):>9} (system {totals['system_tokens_est'] / prompt:.0%}, "
+                f"cached {totals['cached_tokens'] / prompt:.0%})  "
+                f"output {int(totals['completion_tokens']):>8}  ${totals['cost_usd']:.4f}  "
+                f"avg {int((totals['prompt_tokens'] + totals['completion_tokens']) / calls)} tok/call"
+            )
+
+    print(f"\nTop {top} records by cost:")
+    for key, totals in summarize(entries, ("ref", "stage"))[:top]:
+        print(f"  {str(key[0]):<48} {key[1]:<12} {int(totals['calls']):>3} calls  ${totals['cost_usd']:.5f}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report Deepseek token usage and cost from usage_log.jsonl.")
+    parser.add_argument("--log", default=USAGE_LOG, help="Path to the usage log.")
+    parser.add_argument("--run", default=None, help="Only include this run id.")
+    parser.add_argument("--top", type=int, default=10, help="Number of most expensive records to list.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    report(load_log(args.log), run=args.run, top=args.top)
@@ -20,19 +20,16 @@ async function loadProfile() {
     }
 
     try {
-        // Fetch data
-        const response = await fetch(`data.json?ts=${Date.now()}`, { cache: 'no-store' });
-        const data = await response.json();
+        // Small per-person shard first, full dataset only as a fallback
+        const profile = await fetchProfileShard(id) || await findInFullDataset(id);
 
-        // Find record
-        const record = data.find(item => item.id === id);
-
-        if (!record) {
+        if (!profile) {
             showError('Kayıt bulunamadı.');
             return;
         }
 
-        renderProfile(record);
+        renderProfile(profile.record);
+        renderRelated(profile.related);
 
     } catch (error) {
         console.error('Hata:', error);
@@ -40,6 +37,97 @@ async function loadProfile() {
     }
 }
 
+// 32-bit FNV-1a, low byte as two hex chars (mirrors backend/profile_shards.py)
+function shardFor(key) {
+    let h = 0x811c9dc5;
+    for (const byte of new TextEncoder().encode(key)) {
+        h ^= byte;
+        h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return (h & 0xff).toString(16).padStart(2, '0');
+}
+
+// Person shards hold {record, related}; incident shards (multi-victim incidents) hold
+// {incident_id, records} and are shown as their first victim with the others as related
+function profileFrom(records) {
+    return records.length > 0 ? { record: records[0], related: records.slice(1) } : null;
+}
+
+async function fetchProfileShard(id) {
+    try {
+        const response = await fetch(`profiles/${shardFor(id)}/${encodeURIComponent(id)}.json`, { cache: 'no-cache' });
+        if (!response.ok) return null;
+        const shard = await response.json();
+        if (shard.records) return profileFrom(shard.records);
+        return shard.record ? { record: shard.record, related: shard.related || [] } : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Entry of backend/image_store.py's manifest: intrinsic size, blur placeholder, available widths
+async function fetchImageEntry(id) {
+    try {
+        const response = await fetch(`images/manifest/${shardFor(id)}.json`);
+        if (!response.ok) return null;
+        const shard = await response.json();
+        return shard[id] || null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Lets the browser pick the smallest stored width that fits instead of the original;
+// images without a manifest entry load record.image as before
+async function showVictimImage(record, img) {
+    const entry = await fetchImageEntry(record.id);
+    if (entry && entry.sizes && entry.sizes.length > 0) {
+        img.width = entry.w;
+        img.height = entry.h;
+        img.style.backgroundImage = `url("${entry.placeholder}")`;
+        img.style.backgroundSize = 'cover';
+        img.sizes = `${img.parentElement.clientWidth || entry.w}px`;
+        img.srcset = entry.sizes.map(([width, path]) => `${path} ${width}w`).join(', ');
+    }
+    img.src = record.image;
+}
+
+async function findInFullDataset(id) {
+    const response = await fetch(`data.json?ts=${Date.now()}`, { cache: 'no-store' });
+    const data = await response.json();
+    const record = data.find(item => item.id === id);
+    if (!record) return profileFrom(data.filter(item => item.incident_id === id));
+    const related = record.incident_id
+        ? data.filter(item => item.incident_id === record.incident_id && item.id !== record.id)
+        : [];
+    return { record, related };
+}
+
+// Other victims of the same incident, linked to their own profiles
+function renderRelated(related) {
+    const section = document.getElementById('related-section');
+    const list = document.getElementById('related-list');
+    if (!section || !list) return;
+
+    list.innerHTML = '';
+    if (!related || related.length === 0) {
+        section.style.display = 'none';
+        return;
+    }
+    related.forEach(other => {
+        const item = document.createElement('li');
+        item.className = 'detail-row';
+        const link = document.createElement('a');
+        link.className = 'source-link';
+        link.href = `profile.html?id=${encodeURIComponent(other.id)}`;
+        link.textContent = other.person_name || 'İsimsiz İşçi';
+        item.appendChild(link);
+        if (other.age) item.append(` (${other.age})`);
+        list.appendChild(item);
+    });
+    section.style.display = 'block';
+}
+
 function renderProfile(record) {
     // Hide loading, show content
     document.getElementById('loading').style.display = 'none';
@@ -54,8 +142,8 @@ function renderProfile(record) {
     const victimImage = document.getElementById('victim-image');
 
     if (record.image) {
-        victimImage.src = record.image;
         imageContainer.style.display = 'flex';
+        showVictimImage(record, victimImage);
     } else {
         imageContainer.style.display = 'none';
     }
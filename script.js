@@ -1,7 +1,9 @@
 // Global data
 let allAccidents = [];
 let currentFilteredData = []; // Store filtered data for CSV export
-let tableSearchQuery = ''; // For name search in table
+let tableSearchQuery = ''; // Free-text search in table
+let tableSearchMatches = null; // Ids matched via the search index (null = scan fallback)
+let tableSearchSeq = 0; // Drops index results that arrive after a newer keystroke
 let selectedYear = '2025'; // Default year filter
 
 const SECTOR_OPTIONS = [
@@ -240,6 +242,7 @@ function renderMap(data) {
             return;
         }
         const popupContent = `
+            <div class="popup-image" hidden></div>
             <div style="background: linear-gradient(135deg, #2a2a2a 0%, #1f1f1f 100%); padding: 14px 16px; border-bottom: 1px solid #333; margin: -1px -1px 0 -1px;">
                 <div style="margin: 0 0 2px 0; font-size: 16px; font-weight: 600; color: #ffffff;">${escapeHtml(accident.person_name || 'İsimsiz İşçi')}</div>
                 <div style="font-size: 12px; color: #888;">${escapeHtml(accident.date || 'Tarih bilinmiyor')}</div>
@@ -275,6 +278,7 @@ function renderMap(data) {
                 maxWidth: 300,
                 className: 'custom-popup'
             });
+        marker.on('popupopen', (e) => showPopupImage(e.popup, accident.id));
 
         markerArray.push(marker);
     });
@@ -283,6 +287,59 @@ function renderMap(data) {
     markers.addLayers(markerArray);
 }
 
+// Image manifest written by backend/image_store.py: per record id the intrinsic size,
+// a tiny blur placeholder and the available widths. Sharded like the profile files,
+// so opening a popup downloads one small shard and only the image size it renders.
+const IMAGE_MANIFEST_DIR = 'images/manifest';
+const POPUP_IMAGE_WIDTH = 300;
+const imageManifestCache = {};
+
+// 32-bit FNV-1a, low byte as two hex chars (mirrors backend/profile_shards.py)
+function shardFor(key) {
+    let h = 0x811c9dc5;
+    for (const byte of new TextEncoder().encode(key)) {
+        h ^= byte;
+        h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return (h & 0xff).toString(16).padStart(2, '0');
+}
+
+async function loadImageEntry(id) {
+    const shard = shardFor(id);
+    if (!(shard in imageManifestCache)) {
+        imageManifestCache[shard] = fetch(`${IMAGE_MANIFEST_DIR}/${shard}.json`)
+            .then(response => response.ok ? response.json() : {})
+            .catch(() => ({}));
+    }
+    return (await imageManifestCache[shard])[id] || null;
+}
+
+async function showPopupImage(popup, id) {
+    const container = popup.getElement() && popup.getElement().querySelector('.popup-image');
+    if (!container || container.dataset.loaded || !id) return;
+    container.dataset.loaded = 'true';
+
+    const entry = await loadImageEntry(id);
+    if (!entry || !entry.sizes || entry.sizes.length === 0) return;
+
+    // Reserve the final height right away, show the blurred placeholder, then fade in the real image
+    container.style.aspectRatio = `${entry.w} / ${entry.h}`;
+    container.hidden = false;
+    const placeholder = document.createElement('img');
+    placeholder.className = 'placeholder';
+    placeholder.src = entry.placeholder;
+    placeholder.alt = '';
+    const image = document.createElement('img');
+    image.className = 'full';
+    image.alt = 'Kurban Fotoğrafı';
+    image.sizes = `${POPUP_IMAGE_WIDTH}px`;
+    image.srcset = entry.sizes.map(([width, path]) => `${path} ${width}w`).join(', ');
+    image.src = entry.sizes[0][1];
+    image.addEventListener('load', () => image.classList.add('loaded'));
+    container.append(placeholder, image);
+    popup.update();
+}
+
 // Helper function to escape HTML (security)
 function escapeHtml(text) {
     if (!text) return '';
@@ -352,18 +409,101 @@ function parseDate(dateStr) {
     return isNaN(parsed.getTime()) ? new Date(0) : parsed;
 }
 
+// Full-text search index built by backend/search_index.py.
+// Terms are sharded by prefix, so a query only downloads the shards of its own terms.
+// Shard postings are positions in docs.json, so every file is requested with its hash
+// from the (uncached) manifest: a stale docs.json is never paired with a newer shard.
+const SEARCH_DIR = 'search';
+const SEARCH_PREFIX_LENGTH = 2;
+const SEARCH_FIELDS = ['person_name', 'company', 'cause', 'details', 'location', 'district', 'city', 'sector_raw'];
+const searchShardCache = {};
+let searchFiles = null;
+let searchDocIds = null;
+let searchIndexUnavailable = false;
+
+// Mirrors textnorm.fold(): Turkish lowercase, then strip diacritics (ç->c, ğ->g, ı->i, ...)
+function foldText(text) {
+    return String(text || '')
+        .replace(/I/g, 'ı').replace(/İ/g, 'i').toLowerCase()
+        .normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+        .replace(/ı/g, 'i');
+}
+
+// Mirrors search_index.tokenize()
+function tokenize(text) {
+    return (foldText(text).match(/[a-z0-9]+/g) || []).filter(token => token.length >= SEARCH_PREFIX_LENGTH);
+}
+
+function searchFileUrl(name) {
+    return `${SEARCH_DIR}/${name}?v=${searchFiles[name]}`;
+}
+
+async function loadSearchShard(prefix) {
+    const name = `${prefix}.json`;
+    if (!(name in searchFiles)) return {}; // No indexed term has this prefix
+    if (!(prefix in searchShardCache)) {
+        searchShardCache[prefix] = fetch(searchFileUrl(name))
+            .then(response => response.ok ? response.json() : {})
+            .catch(() => ({}));
+    }
+    return searchShardCache[prefix];
+}
+
+// Returns a Set of matching record ids, or null when the index can't answer (scan instead)
+async function searchIndex(query) {
+    const tokens = tokenize(query);
+    if (tokens.length === 0 || searchIndexUnavailable) return null;
+
+    if (!searchDocIds) {
+        try {
+            const manifest = await fetch(`${SEARCH_DIR}/manifest.json`, { cache: 'no-store' });
+            if (!manifest.ok) throw new Error(`HTTP ${manifest.status}`);
+            searchFiles = (await manifest.json()).files || {};
+            if (!('docs.json' in searchFiles)) throw new Error('docs.json missing from the manifest');
+            const response = await fetch(searchFileUrl('docs.json'));
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            searchDocIds = await response.json();
+        } catch (error) {
+            console.warn('Search index unavailable, scanning records instead:', error);
+            searchIndexUnavailable = true;
+            return null;
+        }
+    }
+
+    // Every token must match; a token matches every indexed term it is a prefix of
+    let matched = null;
+    for (const token of tokens) {
+        const shard = await loadSearchShard(token.slice(0, SEARCH_PREFIX_LENGTH));
+        const docs = new Set();
+        for (const [term, deltas] of Object.entries(shard)) {
+            if (!term.startsWith(token)) continue;
+            let doc = 0;
+            for (const delta of deltas) {
+                doc += delta;
+                docs.add(doc);
+            }
+        }
+        matched = matched === null ? docs : new Set([...matched].filter(doc => docs.has(doc)));
+        if (matched.size === 0) break;
+    }
+    return new Set([...matched].map(doc => searchDocIds[doc]));
+}
+
 function renderTable(data) {
     const tbody = document.getElementById('accident-table-body');
     if (!tbody) return; // Guard clause
 
-    // Apply name search filter
+    // Apply text search: index results when available, otherwise a folded scan
     let tableData = data;
     if (tableSearchQuery.trim()) {
-        const query = tableSearchQuery.toLowerCase().trim();
-        tableData = data.filter(item => {
-            const name = (item.person_name || '').toLowerCase();
-            return name.includes(query);
-        });
+        if (tableSearchMatches) {
+            tableData = data.filter(item => tableSearchMatches.has(item.id));
+        } else {
+            const query = foldText(tableSearchQuery.trim());
+            tableData = data.filter(item =>
+                SEARCH_FIELDS.some(field => foldText(item[field]).includes(query))
+            );
+        }
     }
 
     // Sort by date (newest first)
@@ -524,8 +664,12 @@ if (exportBtn) {
 // Table search functionality
 const tableSearchInput = document.getElementById('table-search');
 if (tableSearchInput) {
-    tableSearchInput.addEventListener('input', (e) => {
+    tableSearchInput.addEventListener('input', async (e) => {
         tableSearchQuery = e.target.value;
+        const seq = ++tableSearchSeq;
+        const matches = await searchIndex(tableSearchQuery);
+        if (seq !== tableSearchSeq) return; // A newer query is already running
+        tableSearchMatches = matches;
         renderTable(currentFilteredData);
     });
 }